@@ -22,6 +22,9 @@ class YouTubePlayer(tk.Tk):
         self.search_button_image = PhotoImage(file="src-btn.png")
         self.search_button_image = self.search_button_image.subsample(4, 4)
 
+        # Results of the last search, row i of the listbox is search_results[i]
+        self.search_results = []
+
         # Entry for YouTube search
         self.search_entry = Entry(self, width=50)
         self.search_entry.grid(column=0, row=0, ipadx=10, ipady=5)
@@ -66,6 +69,7 @@ class YouTubePlayer(tk.Tk):
         if query:
             videos_search = VideosSearch(query, limit=10)
             results = videos_search.result()['result']
+            self.search_results = [{'title': r['title'], 'link': r['link']} for r in results]
 
             # Clear previous results from the listbox
             self.results_listbox.delete(0, tk.END)
@@ -79,9 +83,8 @@ class YouTubePlayer(tk.Tk):
 
         if selected_index:
             index = int(selected_index[0])  # Converts to integer
-            query = self.search_entry.get()
-            videos_search = VideosSearch(query, limit=10)
-            video_url = videos_search.result()['result'][index]['link']
+            # Resolve from the stored results instead of searching again, which could return a different list
+            video_url = self.search_results[index]['link']
 
             try:
                 yt = YouTube(video_url)
@@ -23,6 +23,9 @@ class YouTubePlayer(tk.Tk):
         self.search_button_image = PhotoImage(file="src-btn.png")
         self.search_button_image = self.search_button_image.subsample(4, 4)
 
+        # Results of the last search, row i of the listbox is search_results[i]
+        self.search_results = []
+
         # Entry for YouTube search
         self.search_entry = Entry(self, width=50)
         self.search_entry.grid(column=0, row=0, ipadx=10, ipady=5)
@@ -67,6 +70,7 @@ class YouTubePlayer(tk.Tk):
         if query:
             videos_search = VideosSearch(query, limit=10)  # can have more but displays top 10 searched videos
             results = videos_search.result()['result']
+            self.search_results = [{'title': r['title'], 'link': r['link']} for r in results]
 
             # Clear previous results from the listbox, this is used to ensure we dont add too many items as well as not mixing searches
             self.results_listbox.delete(0, tk.END)
@@ -82,9 +86,8 @@ class YouTubePlayer(tk.Tk):
         
         if selected_index:
             index = int(selected_index[0])  # Converts to integer value, I am not familiar enough with this library to understand why my other method didnt work, this does though
-            query = self.search_entry.get()
-            videos_search = VideosSearch(query, limit=10)
-            video_url = videos_search.result()['result'][index]['link']
+            # Resolve from the stored results instead of searching again, which could return a different list
+            video_url = self.search_results[index]['link']
 
             # Start a new thread to download the video
             threading.Thread(target=self.download_video, args=(video_url,)).start()
@@ -2,6 +2,7 @@ import yt_dlp
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
+import time
 
 
 def search_videos():
@@ -52,21 +53,39 @@ def download_video():
     status_label.config(text="Downloading... Please wait.")
     progress_bar.start()
 
+    ffmpeg_steps = []
+    started = {}
+
+    # Times every ffmpeg step that actually ran (merge, remux) so the status line shows what post-processing really cost
+    def pp_hook(d):
+        if d['status'] == 'started':
+            started[d['postprocessor']] = time.perf_counter()
+        elif d['status'] == 'finished' and d['postprocessor'] in started:
+            seconds = time.perf_counter() - started.pop(d['postprocessor'])
+            if d['postprocessor'].startswith('FFmpeg'):
+                ffmpeg_steps.append((d['postprocessor'][len('FFmpeg'):], seconds))
+
+    # Remux instead of FFmpegVideoConvertor: merge_output_format already gives an mp4, and a single
+    # webm/mkv download gets its streams copied into mp4 instead of having the video re-encoded.
+    # yt-dlp skips the remux entirely when the file is already mp4.
     ydl_opts = {
         'format': 'bestvideo+bestaudio/best',
         'outtmpl': '%(title)s.%(ext)s',
         'postprocessors': [{
-            'key': 'FFmpegVideoConvertor',
+            'key': 'FFmpegVideoRemuxer',
             'preferedformat': 'mp4',
         }],
         'merge_output_format': 'mp4',
+        'postprocessor_hooks': [pp_hook],
     }
 
     def run_download():
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             ydl.download([video_url])
+        steps = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in ffmpeg_steps) or "none needed"
+        summary = f"Download complete! (ffmpeg: {steps})"
         root.after(0,
-                   lambda: [status_label.config(text="Download complete!"), progress_bar.stop(), show_success_popup()])
+                   lambda: [status_label.config(text=summary), progress_bar.stop(), show_success_popup()])
 
     threading.Thread(target=run_download, daemon=True).start()
 
@@ -2,7 +2,6 @@ import sys
 import os
 import threading
 import json
-import yt_dlp
 from qtpy.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton,
     QListWidget, QListWidgetItem, QLabel, QFileDialog, QProgressBar, QStackedWidget,
@@ -160,6 +159,7 @@ class YouTubeDownloader(QWidget):
         self.progress.setValue(0)
 
         def perform_search():
+            import yt_dlp  # loaded on first search instead of before the window shows
             try:
                 ydl_opts = {'quiet': True, 'extract_flat': True, 'skip_download': True}
                 with yt_dlp.YoutubeDL(ydl_opts) as ydl:
@@ -187,6 +187,7 @@ class YouTubeDownloader(QWidget):
         self.progress.setValue(0)
 
         def run_download():
+            import yt_dlp
             fmt = self.format_combo.currentText()
             if fmt == "mp3":
                 ydl_opts = {
@@ -2,37 +2,25 @@ import sys
 import os
 import threading
 import json
-import yt_dlp
-import importlib
-from pynput import keyboard
+from qt_binding import load_qt_binding
 
 # Dynamically import Qt bindings: prefer 'qtpy6',
 # fall back to 'qtpy'
 # the rest of the file can use them as if they were imported normally.
 def _load_qt_shim():
     # Taken from QtCore direct import documentation
-    tried = []
-    for pkg in ("qtpy6", "qtpy", "PyQt6", "PySide6", "PyQt5", "PySide2"):
-        tried.append(pkg)
-        try:
-            widgets = importlib.import_module(f"{pkg}.QtWidgets")
-            core = importlib.import_module(f"{pkg}.QtCore")
-            names = [
-                "QApplication", "QWidget", "QVBoxLayout", "QHBoxLayout",
-                "QLineEdit", "QPushButton", "QListWidget", "QListWidgetItem",
-                "QLabel", "QFileDialog", "QProgressBar", "QStackedWidget",
-                "QSpinBox", "QComboBox"
-            ]
-            for n in names:
-                globals()[n] = getattr(widgets, n)
-            globals()["Qt"] = getattr(core, "Qt")
-            return pkg
-        except Exception:
-            continue
-    raise ImportError(
-        "Could not find a Qt binding. Tried: " + ", ".join(tried) +
-        ". Install a shim or a Qt package: e.g. `pip install qtpy pyqt6` or `pip install pyside6 qtpy`."
-    )
+    # qt_binding remembers which one worked last time, so normally this is a single import.
+    pkg, widgets, core, cached = load_qt_binding()
+    names = [
+        "QApplication", "QWidget", "QVBoxLayout", "QHBoxLayout",
+        "QLineEdit", "QPushButton", "QListWidget", "QListWidgetItem",
+        "QLabel", "QFileDialog", "QProgressBar", "QStackedWidget",
+        "QSpinBox", "QComboBox"
+    ]
+    for n in names:
+        globals()[n] = getattr(widgets, n)
+    globals()["Qt"] = getattr(core, "Qt")
+    return pkg
 
 try:
     QT_SHIM = _load_qt_shim()
@@ -204,6 +192,7 @@ class YouTubeDownloader(QWidget):
         self.progress.setValue(0)
 
         def perform_search():
+            import yt_dlp  # loaded on first search instead of before the window shows
             try:
                 ydl_opts = {'quiet': True, 'extract_flat': True, 'skip_download': True}
                 with yt_dlp.YoutubeDL(ydl_opts) as ydl:
@@ -231,6 +220,7 @@ class YouTubeDownloader(QWidget):
         self.progress.setValue(0)
 
         def run_download():
+            import yt_dlp
             fmt = self.format_combo.currentText()
             if fmt == "mp3":
                 ydl_opts = {
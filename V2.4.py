@@ -1,41 +1,55 @@
 import sys
-import os
 import threading
-import json
-import yt_dlp
+import time
 import importlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Loaded first so --profile-startup can re-run us under -X importtime before anything heavy is imported
+import startup_profile
+startup_profile.begin(sys.argv)
+
+from qt_binding import load_qt_binding
+from yt_engine import (
+    DownloadEngine, load_settings, format_bytes, format_eta, EXTERNAL_DOWNLOADERS, DOWNLOAD_FORMATS,
+    parse_bandwidth_schedule, format_bandwidth_schedule, format_label, formats_by_height, is_url, video_id_from_url,
+    JOB_DOWNLOADING, JOB_FAILED,
+)
+startup_profile.mark("engine import")
 
 # Dynamically import Qt bindings: prefer 'qtpy6',
 # fall back to 'qtpy'
 # the rest of the file will then use them as if they were imported normally.
+# qt_binding remembers which one worked last time, so normally this is a single import.
 def _load_qt_shim():
     # Taken from QtCore direct import documentation
-    tried = []
-    for pkg in ("qtpy6", "qtpy", "PyQt6", "PySide6", "PyQt5", "PySide2"):
-        tried.append(pkg)
-        try:
-            widgets = importlib.import_module(f"{pkg}.QtWidgets")
-            core = importlib.import_module(f"{pkg}.QtCore")
-            names = [
-                "QApplication", "QWidget", "QVBoxLayout", "QHBoxLayout",
-                "QLineEdit", "QPushButton", "QListWidget", "QListWidgetItem",
-                "QLabel", "QFileDialog", "QProgressBar", "QStackedWidget",
-                "QSpinBox", "QComboBox"
-            ]
-            for n in names:
-                globals()[n] = getattr(widgets, n)
-            globals()["Qt"] = getattr(core, "Qt")
-            return pkg
-        except Exception:
-            continue
-    raise ImportError(
-        "Could not find a Qt binding. Tried: " + ", ".join(tried) +
-        ". Install a shim or a Qt package: e.g. `pip install qtpy pyqt6` or `pip install pyside6 qtpy`."
-    )
+    pkg, widgets, core, cached = load_qt_binding()
+    names = [
+        "QApplication", "QWidget", "QVBoxLayout", "QHBoxLayout",
+        "QLineEdit", "QPushButton", "QListView", "QListWidget",
+        "QLabel", "QFileDialog", "QStackedWidget",
+        "QSpinBox", "QComboBox", "QTableView", "QHeaderView",
+        "QAbstractItemView", "QCheckBox"
+    ]
+    for n in names:
+        globals()[n] = getattr(widgets, n)
+    globals()["Qt"] = getattr(core, "Qt")
+    globals()["QObject"] = getattr(core, "QObject")
+    globals()["QTimer"] = getattr(core, "QTimer")
+    globals()["QAbstractTableModel"] = getattr(core, "QAbstractTableModel")
+    globals()["QAbstractListModel"] = getattr(core, "QAbstractListModel")
+    globals()["QSize"] = getattr(core, "QSize")
+    # QImage (not QPixmap) so thumbnails can be decoded and scaled on worker threads
+    globals()["QImage"] = getattr(importlib.import_module(f"{pkg}.QtGui"), "QImage")
+    globals()["QModelIndex"] = getattr(core, "QModelIndex")
+    # PyQt calls it pyqtSignal, PySide and qtpy call it Signal
+    globals()["Signal"] = getattr(core, "Signal", None) or getattr(core, "pyqtSignal")
+    return pkg, cached
 
 try:
-    QT_SHIM = _load_qt_shim()
-    print(f"Using Qt shim: {QT_SHIM}")
+    QT_SHIM, QT_SHIM_CACHED = _load_qt_shim()
+    print(f"Using Qt shim: {QT_SHIM}" + (" (cached)" if QT_SHIM_CACHED else ""))
+    startup_profile.mark("qt binding")
 except ImportError as e:
     # Friendly message for users running the script without Qt installed
     msg = (
@@ -52,7 +66,296 @@ except ImportError as e:
     # Exit cleanly without a full traceback
     sys.exit(1)
 
-SETTINGS_FILE = "yt_downloader_settings.json"
+# Max progress repaints per second for each download, yt-dlp fires its hook far more often than that
+PROGRESS_UPDATES_PER_SEC = 10
+# Streamed results reach the list in batches, a 5,000 video channel would otherwise be 5,000 signals
+RESULT_BATCH_SIZE = 50
+RESULT_BATCH_SECONDS = 0.1
+# Thumbnails: scaled to the row's icon size, downloaded/decoded on a small pool,
+# the most recent ones kept decoded in memory
+THUMBNAIL_SIZE = (96, 54)
+THUMBNAIL_WORKERS = 4
+THUMBNAIL_MEMORY_ITEMS = 500
+
+
+def _qt_enum(owner, scope, name):
+    # PyQt6/PySide6 only expose scoped enums (Qt.ItemDataRole.DisplayRole), PyQt5/PySide2 also have Qt.DisplayRole
+    value = getattr(getattr(owner, scope, owner), name, None)
+    return getattr(owner, name) if value is None else value
+
+
+def _qt_int(owner, scope, name):
+    value = _qt_enum(owner, scope, name)
+    return getattr(value, "value", value)
+
+
+DISPLAY_ROLE = _qt_int(Qt, "ItemDataRole", "DisplayRole")
+TOOLTIP_ROLE = _qt_int(Qt, "ItemDataRole", "ToolTipRole")
+DECORATION_ROLE = _qt_int(Qt, "ItemDataRole", "DecorationRole")
+HORIZONTAL = _qt_int(Qt, "Orientation", "Horizontal")
+
+
+# --- Search results ---
+# Two flat lists instead of a dict (or a QListWidgetItem) per row, YouTube rows only keep the
+# 11 character id and get their URL back on access
+class ResultStore:
+    __slots__ = ("keys", "titles")
+
+    def __init__(self):
+        self.keys = []
+        self.titles = []
+
+    def __len__(self):
+        return len(self.titles)
+
+    def __getitem__(self, row):
+        key = self.keys[row]
+        url = key if "/" in key else f"https://www.youtube.com/watch?v={key}"
+        return {'title': self.titles[row], 'url': url}
+
+    def __iter__(self):
+        return (self[row] for row in range(len(self.titles)))
+
+    def extend(self, entries):
+        for entry in entries:
+            self.keys.append(video_id_from_url(entry['url']) or entry['url'])
+            self.titles.append(entry['title'])
+
+    def clear(self):
+        self.keys = []
+        self.titles = []
+
+
+# Thumbnails for the result list. get() answers from memory or queues a load, loaded fires on
+# the GUI thread once the image is ready. Only rows the view paints ask, so only those load.
+class ThumbnailLoader(QObject):
+    loaded = Signal(str, object)
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self._images = OrderedDict()
+        self._pending = set()
+        self._failed = set()
+        self._pool = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS)
+        self.loaded.connect(self._remember)
+
+    def get(self, video_id):
+        image = self._images.get(video_id)
+        if image is not None:
+            self._images.move_to_end(video_id)
+            return image
+        if video_id not in self._pending and video_id not in self._failed:
+            self._pending.add(video_id)
+            self._pool.submit(self._load, video_id)
+        return None
+
+    # Worker thread: disk cache or network, then decode and scale
+    def _load(self, video_id):
+        try:
+            image = QImage.fromData(self.store.get(video_id))
+            if image.isNull():
+                raise ValueError("not an image")
+            image = image.scaled(*THUMBNAIL_SIZE, _qt_enum(Qt, "AspectRatioMode", "KeepAspectRatio"),
+                                 _qt_enum(Qt, "TransformationMode", "SmoothTransformation"))
+        except Exception:
+            image = None
+        self.loaded.emit(video_id, image)
+
+    def _remember(self, video_id, image):
+        self._pending.discard(video_id)
+        if image is None:
+            self._failed.add(video_id)
+            return
+        self._images[video_id] = image
+        while len(self._images) > THUMBNAIL_MEMORY_ITEMS:
+            self._images.popitem(last=False)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ResultListModel(QAbstractListModel):
+    # Rows are handed to the view a page at a time as it scrolls towards the end
+    FETCH_BATCH = 200
+
+    def __init__(self, parent=None, thumbnails=None):
+        super().__init__(parent)
+        self.store = ResultStore()
+        self._shown = 0
+        self.thumbnails = thumbnails
+        # video id -> row, to repaint the right row when a thumbnail arrives
+        self._rows = {}
+        if thumbnails is not None:
+            thumbnails.loaded.connect(self._thumbnail_loaded)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._shown
+
+    def data(self, index, role=DISPLAY_ROLE):
+        role = getattr(role, "value", role)
+        if not index.isValid():
+            return None
+        if role == DISPLAY_ROLE:
+            return self.store.titles[index.row()]
+        if role == TOOLTIP_ROLE:
+            return self.store[index.row()]['url']
+        if role == DECORATION_ROLE and self.thumbnails is not None:
+            key = self.store.keys[index.row()]
+            return None if "/" in key else self.thumbnails.get(key)
+        return None
+
+    def _thumbnail_loaded(self, video_id, image):
+        if image is None:
+            return
+        row = self._rows.get(video_id)
+        if row is not None and row < self._shown:
+            index = self.index(row, 0)
+            self.dataChanged.emit(index, index)
+
+    def _index_rows(self, start):
+        for row in range(start, len(self.store)):
+            self._rows.setdefault(self.store.keys[row], row)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._shown < len(self.store)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(self.FETCH_BATCH, len(self.store) - self._shown)
+        if parent.isValid() or count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._shown, self._shown + count - 1)
+        self._shown += count
+        self.endInsertRows()
+
+    def set_entries(self, entries):
+        self.beginResetModel()
+        self.store.clear()
+        self.store.extend(entries)
+        self._rows = {}
+        self._index_rows(0)
+        self._shown = min(self.FETCH_BATCH, len(self.store))
+        self.endResetModel()
+
+    def append_entries(self, entries):
+        caught_up = self._shown == len(self.store)
+        start = len(self.store)
+        self.store.extend(entries)
+        self._index_rows(start)
+        # The view only asks for more when it scrolls, so rows arriving while everything is shown are pushed
+        if caught_up:
+            self.fetchMore()
+
+    def entry(self, row):
+        return self.store[row] if 0 <= row < len(self.store) else None
+
+
+# --- Downloads table ---
+class JobTableModel(QAbstractTableModel):
+    COLUMNS = ["Title", "Phase", "Progress", "Size", "Speed", "ETA", "Fragments"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = []
+        self._rows = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.jobs)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=DISPLAY_ROLE):
+        role = getattr(role, "value", role)
+        orientation = getattr(orientation, "value", orientation)
+        if role == DISPLAY_ROLE and orientation == HORIZONTAL:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=DISPLAY_ROLE):
+        role = getattr(role, "value", role)
+        if not index.isValid():
+            return None
+        job = self.jobs[index.row()]
+        if role == TOOLTIP_ROLE:
+            if job.state == JOB_DOWNLOADING and job.external:
+                return f"{job.title}\n{job.external} reports back only when the file is done, no progress and no pause/cancel until then"
+            return job.error or job.title
+        if role != DISPLAY_ROLE:
+            return None
+
+        col = index.column()
+        if col == 0:
+            return job.title
+        if col == 1:
+            if job.state == JOB_DOWNLOADING and job.external:
+                return f"{job.state} ({job.external}, can't pause)"
+            return job.state
+        if col == 2:
+            return f"{job.downloaded * 100 // job.total}%" if job.total else ""
+        if col == 3:
+            return f"{format_bytes(job.downloaded)} / {format_bytes(job.total)}" if job.total else format_bytes(job.downloaded)
+        if col == 4:
+            return f"{format_bytes(job.speed)}/s" if job.speed else ""
+        if col == 5:
+            return format_eta(job.eta)
+        if col == 6:
+            return f"{job.fragment}/{job.fragments}" if job.fragments else ""
+        return None
+
+    def add_job(self, job):
+        row = len(self.jobs)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.jobs.append(job)
+        self._rows[job.id] = row
+        self.endInsertRows()
+
+    def job_updated(self, job):
+        row = self._rows.get(job.id)
+        if row is not None:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+
+    def total_speed(self):
+        return sum(job.speed for job in self.jobs if job.state == JOB_DOWNLOADING)
+
+
+# --- Worker -> GUI bridge ---
+# Worker threads never touch widgets directly. Signals emitted from a worker thread are
+# delivered on the GUI thread (queued connection), and progress ticks are coalesced here
+# so each job repaints at most PROGRESS_UPDATES_PER_SEC times per second.
+class UiBridge(QObject):
+    search_entries = Signal(object, object)
+    search_finished = Signal(object, object, object)
+    search_failed = Signal(str)
+    formats_ready = Signal(object, object)
+    formats_failed = Signal(object, str)
+    job_changed = Signal(object)
+    job_progress = Signal(object, object)
+    progress_flushed = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = QTimer(self)
+        self._timer.setInterval(int(1000 / PROGRESS_UPDATES_PER_SEC))
+        self._timer.timeout.connect(self._flush)
+        self._timer.start()
+
+    # Called from worker threads, only the latest tick per job survives until the next flush
+    def post_progress(self, job, d):
+        with self._lock:
+            self._pending[job.id] = (job, d)
+
+    def _flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+        for job, d in pending.values():
+            self.job_progress.emit(job, d)
+        self.progress_flushed.emit()
+
 
 class YouTubeDownloader(QWidget):
     def __init__(self):
@@ -62,6 +365,22 @@ class YouTubeDownloader(QWidget):
 
         # --- Load settings ---
         self.load_settings()
+        self.engine = DownloadEngine(self.settings)
+        self.search_cache = self.engine.search_cache
+        self.search_generation = 0
+        self.probe_generation = 0
+
+        self.bridge = UiBridge(self)
+        self.bridge.search_entries.connect(self.add_results)
+        self.bridge.search_finished.connect(self.on_search_finished)
+        self.bridge.search_failed.connect(lambda msg: self.search_status_label.setText(f"Error: {msg}"))
+        self.bridge.formats_ready.connect(self.show_formats)
+        self.bridge.formats_failed.connect(self.on_probe_failed)
+        self.bridge.job_changed.connect(self.on_job_changed)
+        self.bridge.job_progress.connect(self.on_job_progress)
+        self.bridge.progress_flushed.connect(self.update_throughput)
+        self.engine.on_job_changed = self.bridge.job_changed.emit
+        self.engine.on_progress = self.bridge.post_progress
 
         # --- Main Layout ---
         main_layout = QHBoxLayout(self)
@@ -107,7 +426,7 @@ class YouTubeDownloader(QWidget):
         search_layout = QVBoxLayout(search_page)
 
         self.search_bar = QLineEdit()
-        self.search_bar.setPlaceholderText("Search YouTube...")
+        self.search_bar.setPlaceholderText("Search YouTube, or paste a video, playlist or channel URL...")
         self.search_bar.setStyleSheet("padding: 8px; border-radius: 6px; background-color: #23272A; color: white;")
         self.search_button = QPushButton("Search")
         self.search_button.setStyleSheet("background-color: #5865F2; color: white; border-radius: 6px; padding: 6px;")
@@ -118,34 +437,126 @@ class YouTubeDownloader(QWidget):
         search_controls.addWidget(self.search_bar)
         search_controls.addWidget(self.search_button)
 
-        self.results_list = QListWidget()
+        self.thumbnails = ThumbnailLoader(self.engine.thumbnails, self)
+        self.results_model = ResultListModel(self, self.thumbnails)
+        self.results_list = QListView()
+        self.results_list.setModel(self.results_model)
+        self.results_list.setIconSize(QSize(*THUMBNAIL_SIZE))
+        # Every row has the same height, so the view never measures rows it doesn't paint
+        self.results_list.setUniformItemSizes(True)
         self.results_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: #2C2F33;
                 color: white;
                 border: none;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 10px;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #5865F2;
                 border-radius: 6px;
             }
         """)
 
+        self.search_status_label = QLabel(self.search_cache.stats_text())
+        self.search_status_label.setStyleSheet("color: #B9BBBE; font-size: 9pt;")
+
         self.download_btn = QPushButton("Download")
         self.download_btn.setStyleSheet("background-color: #5865F2; color: white; border-radius: 6px; padding: 8px;")
-        self.download_btn.clicked.connect(self.download_video)
-
-        self.progress = QProgressBar()
-        self.progress.setStyleSheet("QProgressBar {background: #23272A; color: white; border-radius: 6px;} QProgressBar::chunk {background: #5865F2;}")
-        self.progress.setValue(0)
+        self.download_btn.clicked.connect(lambda: self.download_video())
+
+        # Same as Download but jumps ahead of everything already waiting in the queue
+        self.download_next_btn = QPushButton("Download Next")
+        self.download_next_btn.setStyleSheet("background-color: #5865F2; color: white; border-radius: 6px; padding: 8px;")
+        self.download_next_btn.clicked.connect(lambda: self.download_video(priority=1))
+
+        # Share of the bandwidth cap the new download gets next to the ones already running
+        self.weight_spin = QSpinBox()
+        self.weight_spin.setRange(1, 10)
+        self.weight_spin.setValue(1)
+        self.weight_spin.setStyleSheet("color: white; background-color: #23272A; border-radius: 6px;")
+        weight_label = QLabel("Weight:")
+        weight_label.setStyleSheet("color: white;")
+
+        # Everything in the result list, e.g. a whole playlist
+        self.download_all_btn = QPushButton("Download All")
+        self.download_all_btn.setStyleSheet("background-color: #4F545C; color: white; border-radius: 6px; padding: 8px;")
+        self.download_all_btn.clicked.connect(self.download_all)
+
+        download_controls = QHBoxLayout()
+        download_controls.addWidget(self.download_btn)
+        download_controls.addWidget(self.download_next_btn)
+        download_controls.addWidget(self.download_all_btn)
+        download_controls.addWidget(weight_label)
+        download_controls.addWidget(self.weight_spin)
+
+        # Filled with the selected video's resolutions once they are probed, Auto uses the Settings cap
+        self.resolution_combo = QComboBox()
+        self.resolution_combo.addItem("Auto", None)
+        self.resolution_combo.setMinimumWidth(260)
+        self.resolution_combo.setStyleSheet("color: white; background-color: #23272A; border-radius: 6px;")
+        download_controls.addWidget(self.resolution_combo)
+
+        # Arrowing through the list shouldn't fire a probe per row
+        self.probe_timer = QTimer(self)
+        self.probe_timer.setSingleShot(True)
+        self.probe_timer.setInterval(250)
+        self.probe_timer.timeout.connect(self.probe_selected)
+        self.results_list.selectionModel().currentRowChanged.connect(lambda *_: self.probe_timer.start())
+
+        # One row per download, so a slow transfer stands out instead of fighting over a single bar
+        self.jobs_model = JobTableModel(self)
+        self.jobs_view = QTableView()
+        self.jobs_view.setModel(self.jobs_model)
+        self.jobs_view.verticalHeader().setVisible(False)
+        self.jobs_view.setSelectionBehavior(_qt_enum(QAbstractItemView, "SelectionBehavior", "SelectRows"))
+        self.jobs_view.horizontalHeader().setSectionResizeMode(0, _qt_enum(QHeaderView, "ResizeMode", "Stretch"))
+        self.jobs_view.setStyleSheet("QTableView {background-color: #2C2F33; color: white; border: none;} QHeaderView::section {background-color: #23272A; color: white;}")
+
+        self.throughput_label = QLabel("Total: 0 B/s")
+        self.throughput_label.setStyleSheet("color: white;")
+
+        job_controls = QHBoxLayout()
+        for text, handler in (("Pause", self.pause_jobs), ("Resume", self.resume_jobs), ("Cancel", self.cancel_jobs)):
+            btn = QPushButton(text)
+            btn.setStyleSheet("background-color: #4F545C; color: white; border-radius: 6px; padding: 6px;")
+            btn.clicked.connect(handler)
+            job_controls.addWidget(btn)
+        job_controls.addStretch()
+        job_controls.addWidget(self.throughput_label)
+
+        # Queue depth and utilization of the download and ffmpeg stages, for sizing the two pools
+        self.stages_label = QLabel("")
+        self.stages_label.setStyleSheet("color: #B9BBBE; font-size: 9pt;")
+        self.stages_timer = QTimer(self)
+        self.stages_timer.setInterval(2000)
+        self.stages_timer.timeout.connect(self.update_stages)
+        self.stages_timer.start()
+
+        # Jobs that failed for good (retries used up, or an error retrying won't fix)
+        self.failed_jobs = []
+        self.failures_list = QListWidget()
+        self.failures_list.setMaximumHeight(110)
+        self.failures_list.setStyleSheet("QListWidget {background-color: #2C2F33; color: #ED4245; border: none;}")
+
+        failure_controls = QHBoxLayout()
+        for text, handler in (("Retry Failed", self.retry_failures), ("Clear Failed", self.clear_failures)):
+            btn = QPushButton(text)
+            btn.setStyleSheet("background-color: #4F545C; color: white; border-radius: 6px; padding: 6px;")
+            btn.clicked.connect(handler)
+            failure_controls.addWidget(btn)
+        failure_controls.addStretch()
 
         search_layout.addLayout(search_controls)
         search_layout.addWidget(self.results_list)
-        search_layout.addWidget(self.download_btn)
-        search_layout.addWidget(self.progress)
+        search_layout.addWidget(self.search_status_label)
+        search_layout.addLayout(download_controls)
+        search_layout.addWidget(self.jobs_view)
+        search_layout.addLayout(job_controls)
+        search_layout.addWidget(self.stages_label)
+        search_layout.addWidget(self.failures_list)
+        search_layout.addLayout(failure_controls)
 
         # --- Settings Page ---
         settings_page = QWidget()
@@ -160,13 +571,88 @@ class YouTubeDownloader(QWidget):
 
         # Search limit
         self.limit_spin = QSpinBox()
+        self.limit_spin.setRange(1, 1000)
         self.limit_spin.setValue(self.search_limit)
-        self.limit_spin.setRange(1, 50)
         self.limit_spin.setStyleSheet("color: white; background-color: #23272A; border-radius: 6px;")
 
+        # Concurrent downloads
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 16)
+        self.concurrency_spin.setValue(self.max_concurrent)
+        self.concurrency_spin.setStyleSheet("color: white; background-color: #23272A; border-radius: 6px;")
+
+        # Parallel connections per download and across all downloads
+        self.fragments_spin = QSpinBox()
+        self.fragments_spin.setRange(1, 32)
+        self.fragments_spin.setValue(self.settings["concurrent_fragments"])
+        self.fragments_spin.setStyleSheet("color: white; background-color: #23272A; border-radius: 6px;")
+
+        self.connections_spin = QSpinBox()
+        self.connections_spin.setRange(1, 128)
+        self.connections_spin.setValue(self.settings["max_connections"])
+        self.connections_spin.setStyleSheet("color: white; background-color: #23272A; border-radius: 6px;")
+
+        self.downloader_combo = QComboBox()
+        self.downloader_combo.addItems(list(EXTERNAL_DOWNLOADERS))
+        self.downloader_combo.setCurrentText(self.settings["external_downloader"])
+        self.downloader_combo.setStyleSheet("color: white; background-color: #23272A; border-radius: 6px;")
+
+        # Bandwidth cap across all downloads, optionally different per time of day
+        self.bandwidth_spin = QSpinBox()
+        self.bandwidth_spin.setRange(0, 1000000)
+        self.bandwidth_spin.setValue(self.settings["bandwidth_limit_kbps"])
+        self.bandwidth_spin.setStyleSheet("color: white; background-color: #23272A; border-radius: 6px;")
+
+        self.schedule_edit = QLineEdit(format_bandwidth_schedule(self.settings["bandwidth_schedule"]))
+        self.schedule_edit.setPlaceholderText("e.g. 09:00-17:00=2000, 22:00-06:00=0")
+        self.schedule_edit.setStyleSheet("padding: 4px; border-radius: 6px; background-color: #23272A; color: white;")
+        self.schedule_error_label = QLabel("")
+        self.schedule_error_label.setStyleSheet("color: #ED4245; font-size: 9pt;")
+
+        # Audio formats (everything but mp4)
+        self.audio_floor_spin = QSpinBox()
+        self.audio_floor_spin.setRange(0, 512)
+        self.audio_floor_spin.setValue(self.settings["audio_min_kbps"])
+        self.audio_floor_spin.setStyleSheet("color: white; background-color: #23272A; border-radius: 6px;")
+
+        self.strict_audio_check = QCheckBox("Audio-only streams only (never download the video to get the audio)")
+        self.strict_audio_check.setChecked(self.settings["strict_audio_only"])
+        self.strict_audio_check.setStyleSheet("color: white;")
+
+        self.keep_native_check = QCheckBox("Keep the original file when its codec fits (no ffmpeg)")
+        self.keep_native_check.setChecked(self.settings["keep_native_audio"])
+        self.keep_native_check.setStyleSheet("color: white;")
+
+        self.postprocess_spin = QSpinBox()
+        self.postprocess_spin.setRange(0, 64)
+        self.postprocess_spin.setValue(self.settings["postprocess_workers"])
+        self.postprocess_spin.setStyleSheet("color: white; background-color: #23272A; border-radius: 6px;")
+
+        self.retries_spin = QSpinBox()
+        self.retries_spin.setRange(0, 20)
+        self.retries_spin.setValue(self.settings["max_retries"])
+        self.retries_spin.setStyleSheet("color: white; background-color: #23272A; border-radius: 6px;")
+
+        self.skip_archived_check = QCheckBox("Skip videos that are already downloaded")
+        self.skip_archived_check.setChecked(self.settings["skip_archived"])
+        self.skip_archived_check.setStyleSheet("color: white;")
+
+        # Applies to every mp4 download left on Auto
+        self.max_height_combo = QComboBox()
+        for height in (0, 2160, 1440, 1080, 720, 480, 360):
+            self.max_height_combo.addItem(f"{height}p" if height else "No limit", height)
+        index = self.max_height_combo.findData(self.settings["max_height"])
+        self.max_height_combo.setCurrentIndex(max(0, index))
+        self.max_height_combo.setStyleSheet("color: white; background-color: #23272A; border-radius: 6px;")
+
+        self.max_bitrate_spin = QSpinBox()
+        self.max_bitrate_spin.setRange(0, 200000)
+        self.max_bitrate_spin.setValue(self.settings["max_bitrate_kbps"])
+        self.max_bitrate_spin.setStyleSheet("color: white; background-color: #23272A; border-radius: 6px;")
+
         # Format selection
         self.format_combo = QComboBox()
-        self.format_combo.addItems(["mp4", "mp3"])
+        self.format_combo.addItems(list(DOWNLOAD_FORMATS))
         self.format_combo.setCurrentText(self.download_format)
         self.format_combo.setStyleSheet("color: white; background-color: #23272A; border-radius: 6px;")
 
@@ -179,8 +665,34 @@ class YouTubeDownloader(QWidget):
         settings_layout.addWidget(self.folder_btn)
         settings_layout.addWidget(QLabel("Search Results Limit:", self))
         settings_layout.addWidget(self.limit_spin)
+        settings_layout.addWidget(QLabel("Concurrent Downloads:", self))
+        settings_layout.addWidget(self.concurrency_spin)
+        settings_layout.addWidget(QLabel("Connections per Download (DASH/HLS fragments):", self))
+        settings_layout.addWidget(self.fragments_spin)
+        settings_layout.addWidget(QLabel("Max Connections (all downloads):", self))
+        settings_layout.addWidget(self.connections_spin)
+        settings_layout.addWidget(QLabel("Downloader:", self))
+        settings_layout.addWidget(self.downloader_combo)
+        settings_layout.addWidget(QLabel("Bandwidth Limit (KB/s, 0 = unlimited):", self))
+        settings_layout.addWidget(self.bandwidth_spin)
+        settings_layout.addWidget(QLabel("Bandwidth Schedule (overrides the limit, 0 = unlimited):", self))
+        settings_layout.addWidget(self.schedule_edit)
+        settings_layout.addWidget(self.schedule_error_label)
         settings_layout.addWidget(QLabel("Download Format:", self))
         settings_layout.addWidget(self.format_combo)
+        settings_layout.addWidget(QLabel("Max Resolution:", self))
+        settings_layout.addWidget(self.max_height_combo)
+        settings_layout.addWidget(QLabel("Max Video Bitrate (kbps, 0 = unlimited):", self))
+        settings_layout.addWidget(self.max_bitrate_spin)
+        settings_layout.addWidget(self.skip_archived_check)
+        settings_layout.addWidget(QLabel("Minimum Audio Bitrate (kbps, 0 = best available):", self))
+        settings_layout.addWidget(self.audio_floor_spin)
+        settings_layout.addWidget(self.strict_audio_check)
+        settings_layout.addWidget(self.keep_native_check)
+        settings_layout.addWidget(QLabel("Parallel ffmpeg Jobs (0 = one per CPU core):", self))
+        settings_layout.addWidget(self.postprocess_spin)
+        settings_layout.addWidget(QLabel("Retries for throttling/network errors:", self))
+        settings_layout.addWidget(self.retries_spin)
         settings_layout.addWidget(self.save_btn)
         settings_layout.addStretch()
 
@@ -193,89 +705,227 @@ class YouTubeDownloader(QWidget):
 
         self.setStyleSheet("background-color: #36393F; font-family: Arial; font-size: 12pt;")
 
+        # Whatever was still queued or downloading when the app last closed (or crashed)
+        resumed = self.engine.recover()
+        for job in resumed:
+            self.jobs_model.add_job(job)
+        if resumed:
+            self.search_status_label.setText(f"Resumed {len(resumed)} downloads from the last session")
+
     # --- Logic ---
     def search_videos(self):
         query = self.search_bar.text().strip()
         if not query:
             return
 
-        self.results_list.clear()
-        self.progress.setValue(0)
+        limit = self.limit_spin.value()
+        # Bumping the generation cancels whatever search is still running
+        self.search_generation += 1
+        generation = self.search_generation
+
+        # Playlist/channel listings aren't cached, they can be huge and change all the time
+        listing = is_url(query)
+        entries, fresh = (None, False) if listing else self.search_cache.get(query, limit)
+        self.search_status_label.setText("Listing..." if listing else self.search_cache.stats_text())
+        if entries is not None:
+            self.show_results(generation, entries)
+            if fresh:
+                return
+        else:
+            self.results_model.set_entries([])
+
+        # Misses stream rows in as yt-dlp extracts them. Stale hits stay on screen and are
+        # swapped for the refreshed list in one go once it is complete.
+        stream = entries is None
 
         def perform_search():
             try:
-                ydl_opts = {'quiet': True, 'extract_flat': True, 'skip_download': True}
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    result = ydl.extract_info(f"ytsearch{self.limit_spin.value()}:{query}", download=False)
+                started = time.perf_counter()
+                first_at = None
+                count = 0
+                entries = []
+                batch = []
+                flushed_at = started
+                results = self.engine.iter_playlist(query) if listing else self.engine.iter_search(query, limit)
+                try:
+                    for entry in results:
+                        if generation != self.search_generation:
+                            return
+                        count += 1
+                        if not listing:
+                            entries.append(entry)
+                        if first_at is None:
+                            first_at = time.perf_counter() - started
+                        if stream:
+                            batch.append(entry)
+                            now = time.perf_counter()
+                            if len(batch) >= RESULT_BATCH_SIZE or now - flushed_at >= RESULT_BATCH_SECONDS:
+                                self.bridge.search_entries.emit(generation, batch)
+                                batch = []
+                                flushed_at = now
+                finally:
+                    results.close()
+                if batch:
+                    self.bridge.search_entries.emit(generation, batch)
+
+                elapsed = time.perf_counter() - started
+                if not listing:
+                    self.search_cache.put(query, limit, entries, elapsed)
+                self.bridge.search_finished.emit(generation, None if stream else entries, (first_at, elapsed, count))
+            except Exception as e:
+                if generation == self.search_generation:
+                    self.bridge.search_failed.emit(str(e))
 
-                entries = result.get("entries", [])
-                self.video_entries = [{'title': e['title'], 'url': f"https://www.youtube.com/watch?v={e['id']}"} for e in entries]
+        threading.Thread(target=perform_search, daemon=True).start()
 
-                self.results_list.clear()
-                for v in self.video_entries:
-                    item = QListWidgetItem(v['title'])
-                    self.results_list.addItem(item)
+    # --- Search results (GUI thread) ---
+    def show_results(self, generation, entries):
+        # A slow search (or a background refresh) must not overwrite a newer query's results
+        if generation != self.search_generation:
+            return
+        self.results_model.set_entries(entries)
 
-            except Exception as e:
-                self.results_list.addItem(f"Error: {e}")
+    def add_results(self, generation, entries):
+        if generation != self.search_generation:
+            return
+        self.results_model.append_entries(entries)
 
-        threading.Thread(target=perform_search, daemon=True).start()
+    def on_search_finished(self, generation, entries, timing):
+        if generation != self.search_generation:
+            return
+        if entries is not None:
+            self.show_results(generation, entries)
+        first_at, elapsed, count = timing
+        first_text = f"first result {first_at:.2f}s, " if first_at is not None else ""
+        self.search_status_label.setText(
+            f"{count} results: {first_text}all in {elapsed:.2f}s | {self.search_cache.stats_text()}"
+        )
+
+    def download_video(self, priority=0):
+        entry = self.results_model.entry(self.results_list.currentIndex().row())
+        if entry is None:
+            return
 
-    def download_video(self):
-        selected = self.results_list.currentRow()
-        if selected == -1:
+        # Meh Meh Meh why are you threading this, you dont need to do that, it uses more resources
+        # Shut up, it stops the entire app and feels clunky without it, youre running a pc not a commadore 83
+        # (it's the engine's fixed worker pool now, so 30 clicks no longer means 30 ffmpeg merges at once)
+        job = self.engine.submit(entry['url'], entry['title'], self.format_combo.currentText(), self.output_dir, priority,
+                                 self.weight_spin.value(), self.resolution_combo.currentData())
+        self.jobs_model.add_job(job)
+
+    def download_all(self):
+        store = self.results_model.store
+        if not len(store):
             return
-        video_url = self.video_entries[selected]['url']
-
-        self.progress.setValue(0)
-
-        def run_download():
-            fmt = self.format_combo.currentText()
-            if fmt == "mp3":
-                ydl_opts = {
-                    'format': 'bestaudio/best',
-                    'outtmpl': os.path.join(self.output_dir, '%(title)s.%(ext)s'),
-                    'postprocessors': [
-                        {'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': '192'}
-                    ],
-                    'progress_hooks': [self.hook],
-                }
-            else:
-                # DEV NOTE 10/29: Proper ffmpeg remuxing for synced audio/video
-                ydl_opts = {
-                    'format': 'bestvideo+bestaudio/best',
-                    'merge_output_format': 'mp4',
-                    'outtmpl': os.path.join(self.output_dir, '%(title)s.%(ext)s'),
-                    'progress_hooks': [self.hook],
-                    'postprocessor_args': [
-                        '-c:v', 'copy',
-                        '-c:a', 'aac',
-                        '-strict', 'experimental',
-                        '-fflags', '+genpts'
-                    ],
-                    'postprocessors': [{
-                        'key': 'FFmpegVideoRemuxer',
-                        'preferedformat': 'mp4',
-                    }],
-                }
+        jobs = self.engine.submit_all(store, fmt=self.format_combo.currentText(),
+                                      output_dir=self.output_dir, weight=self.weight_spin.value())
+        for job in jobs:
+            self.jobs_model.add_job(job)
+        skipped = len(store) - len(jobs)
+        self.search_status_label.setText(f"Queued {len(jobs)} downloads" + (f", {skipped} already queued" if skipped else ""))
+
+    # --- Format probing ---
+    def probe_selected(self):
+        self.probe_generation += 1
+        generation = self.probe_generation
+        self.resolution_combo.clear()
+        self.resolution_combo.addItem("Auto", None)
+        entry = self.results_model.entry(self.results_list.currentIndex().row())
+        if entry is None:
+            return
+        url = entry['url']
+        self.resolution_combo.setItemText(0, "Auto (probing formats...)")
 
+        def perform_probe():
             try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([video_url])
+                # Cached ids come straight back, only new ones hit the network
+                self.bridge.formats_ready.emit(generation, self.engine.probe_formats(url))
             except Exception as e:
-                self.results_list.addItem(f"Download failed: {e}")
+                self.bridge.formats_failed.emit(generation, str(e))
 
-        # Meh Meh Meh why are you threading this, you dont need to do that, it uses more resources
-        # Shut up, it stops the entire app and feels clunky without it, youre running a pc not a commadore 83
-        threading.Thread(target=run_download, daemon=True).start()
+        threading.Thread(target=perform_probe, daemon=True).start()
 
-    def hook(self, d):
-        if d['status'] == 'downloading':
-            if d.get('total_bytes'):
-                percent = int(d['downloaded_bytes'] * 100 / d['total_bytes'])
-                self.progress.setValue(percent)
-        elif d['status'] == 'finished':
-            self.progress.setValue(100)
+    def show_formats(self, generation, formats):
+        if generation != self.probe_generation:
+            return
+        self.resolution_combo.setItemText(0, "Auto")
+        # The format the download will pick for each height, so the label shows the codec you get
+        for f in formats_by_height(formats, self.settings["max_bitrate_kbps"]):
+            self.resolution_combo.addItem(format_label(f), f['height'])
+
+    def on_probe_failed(self, generation, msg):
+        if generation == self.probe_generation:
+            self.resolution_combo.setItemText(0, "Auto (formats unavailable)")
+            print(f"Format probe failed: {msg}")
+
+    # --- GUI thread slots ---
+    def on_job_changed(self, job):
+        if job.state == JOB_FAILED and job not in self.failed_jobs:
+            self.failed_jobs.append(job)
+            self.failures_list.addItem(f"[{job.error_kind}] {job.title}: {job.error}")
+        self.jobs_model.job_updated(job)
+        self.update_throughput()
+
+    # The engine already stored the numbers on the job, this only repaints its row
+    def on_job_progress(self, job, d):
+        self.jobs_model.job_updated(job)
+
+    def selected_jobs(self):
+        rows = sorted({index.row() for index in self.jobs_view.selectionModel().selectedRows()})
+        return [self.jobs_model.jobs[row] for row in rows]
+
+    # Selected failures, or all of them when nothing is selected
+    def retry_failures(self):
+        rows = sorted({index.row() for index in self.failures_list.selectedIndexes()}) or range(len(self.failed_jobs))
+        for row in reversed(list(rows)):
+            job = self.failed_jobs.pop(row)
+            self.failures_list.takeItem(row)
+            self.engine.retry(job)
+
+    def clear_failures(self):
+        self.failed_jobs = []
+        self.failures_list.clear()
+
+    def pause_jobs(self):
+        for job in self.selected_jobs():
+            self.engine.pause(job)
+
+    def resume_jobs(self):
+        for job in self.selected_jobs():
+            self.engine.resume(job)
+
+    def cancel_jobs(self):
+        for job in self.selected_jobs():
+            self.engine.cancel(job)
+
+    def update_throughput(self):
+        active = sum(1 for job in self.jobs_model.jobs if job.state == JOB_DOWNLOADING)
+        self.throughput_label.setText(
+            f"Total: {format_bytes(self.jobs_model.total_speed())}/s ({active} active, {self.engine.scheduler.pending()} queued)"
+        )
+
+    def update_stages(self):
+        parts = []
+        stats = self.engine.stage_stats()
+        for name, key in (("Download", "network"), ("ffmpeg", "postprocess")):
+            stage = stats[key]
+            parts.append(f"{name}: {stage['busy']}/{stage['workers']} busy, {stage['queued']} queued, "
+                         f"{stage['utilization'] * 100:.0f}% utilized")
+        audio = stats["audio_extraction"]
+        if audio["files"]:
+            parts.append(f"Audio: {audio['audio_minutes_per_second']:.1f} audio-min/s over {audio['files']} files")
+        self.stages_label.setText(" | ".join(parts))
+
+    def on_first_paint(self):
+        startup_profile.mark("first paint")
+        startup_profile.report()
+        # yt-dlp is only needed once someone searches, load it now that the window is up
+        self.engine.warm_up()
+
+    def closeEvent(self, event):
+        self.thumbnails.shutdown()
+        self.engine.close()
+        super().closeEvent(event)
 
     def change_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Select Download Folder")
@@ -287,39 +937,50 @@ class YouTubeDownloader(QWidget):
     def save_settings(self):
         self.search_limit = self.limit_spin.value()
         self.download_format = self.format_combo.currentText()
-
-        settings = {
+        self.max_concurrent = self.concurrency_spin.value()
+        try:
+            schedule = parse_bandwidth_schedule(self.schedule_edit.text())
+            self.schedule_error_label.setText("")
+        except ValueError as e:
+            # Keep the last good schedule rather than dropping the limit
+            schedule = self.settings["bandwidth_schedule"]
+            self.schedule_error_label.setText(str(e))
+
+        self.settings.update({
             "output_dir": self.output_dir,
             "search_limit": self.search_limit,
-            "download_format": self.download_format
-        }
-
-        try:
-            with open(SETTINGS_FILE, "w") as f:
-                json.dump(settings, f, indent=4)
-        except Exception as e:
-            print(f"Failed to save settings: {e}")
+            "download_format": self.download_format,
+            "max_concurrent_downloads": self.max_concurrent,
+            "concurrent_fragments": self.fragments_spin.value(),
+            "max_connections": self.connections_spin.value(),
+            "external_downloader": self.downloader_combo.currentText(),
+            "bandwidth_limit_kbps": self.bandwidth_spin.value(),
+            "bandwidth_schedule": schedule,
+            "skip_archived": self.skip_archived_check.isChecked(),
+            "max_height": self.max_height_combo.currentData(),
+            "max_bitrate_kbps": self.max_bitrate_spin.value(),
+            "max_retries": self.retries_spin.value(),
+            "postprocess_workers": self.postprocess_spin.value(),
+            "audio_min_kbps": self.audio_floor_spin.value(),
+            "strict_audio_only": self.strict_audio_check.isChecked(),
+            "keep_native_audio": self.keep_native_check.isChecked(),
+        })
+        self.engine.apply_settings()
+        self.engine.save_settings()
 
     def load_settings(self):
-        if os.path.exists(SETTINGS_FILE):
-            try:
-                with open(SETTINGS_FILE, "r") as f:
-                    settings = json.load(f)
-                self.output_dir = settings.get("output_dir", os.getcwd())
-                self.search_limit = settings.get("search_limit", 10)
-                self.download_format = settings.get("download_format", "mp4")
-            except Exception:
-                self.output_dir = os.getcwd()
-                self.search_limit = 10
-                self.download_format = "mp4"
-        else:
-            self.output_dir = os.getcwd()
-            self.search_limit = 10
-            self.download_format = "mp4"
+        self.settings = load_settings()
+        self.output_dir = self.settings["output_dir"]
+        self.search_limit = self.settings["search_limit"]
+        self.download_format = self.settings["download_format"]
+        self.max_concurrent = self.settings["max_concurrent_downloads"]
 
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     win = YouTubeDownloader()
+    startup_profile.mark("window built")
     win.show()
+    # Runs on the first event loop pass, right after the window has been painted
+    QTimer.singleShot(0, win.on_first_paint)
     sys.exit(app.exec())
@@ -0,0 +1,83 @@
+import os
+import sys
+import json
+import time
+import subprocess
+import importlib.util
+
+# Populate time and memory of the search result list, old QListWidget vs the model-backed
+# QListView in V2.4.py, at 100 / 1k / 10k rows. Every run is its own process so the RSS
+# numbers don't include the previous run.
+#   python bench_results_view.py
+
+SIZES = (100, 1000, 10000)
+MODES = ("QListWidget", "ResultListModel")
+GUI_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "V2.4.py")
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        # No /proc (Windows, macOS): peak instead of current, still fine for a before/after
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def fake_entries(n):
+    return [{'title': f"Result {i}: some reasonably long video title like the ones search returns",
+             'url': f"https://www.youtube.com/watch?v={i:011d}"} for i in range(n)]
+
+
+def run_one(mode, n):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    spec = importlib.util.spec_from_file_location("yt_gui", GUI_SCRIPT)
+    gui = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gui)
+    widgets = sys.modules[gui.QApplication.__module__]
+    app = gui.QApplication([])
+
+    entries = fake_entries(n)
+    before = rss_bytes()
+    started = time.perf_counter()
+    if mode == "QListWidget":
+        view = widgets.QListWidget()
+        for entry in entries:
+            view.addItem(widgets.QListWidgetItem(entry['title']))
+    else:
+        view = gui.QListView()
+        view.setUniformItemSizes(True)
+        model = gui.ResultListModel(view)
+        view.setModel(model)
+        model.set_entries(entries)
+    view.resize(800, 600)
+    view.show()
+    app.processEvents()
+    elapsed = time.perf_counter() - started
+    # Drop the source list so only what the view keeps is counted
+    del entries
+    return {"mode": mode, "rows": n, "seconds": elapsed, "rss_delta": rss_bytes() - before}
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        print(json.dumps(run_one(sys.argv[2], int(sys.argv[3]))))
+        return 0
+
+    print(f"{'rows':>6}  {'view':<16} {'populate':>10} {'RSS +':>10}")
+    for n in SIZES:
+        for mode in MODES:
+            out = subprocess.run([sys.executable, __file__, "--child", mode, str(n)],
+                                 capture_output=True, text=True)
+            if out.returncode != 0:
+                print(out.stdout + out.stderr)
+                return 1
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{n:>6}  {mode:<16} {result['seconds'] * 1000:>8.1f}ms {result['rss_delta'] / 1024 / 1024:>8.1f}MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
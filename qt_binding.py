@@ -0,0 +1,75 @@
+import os
+import sys
+import json
+import site
+import importlib
+import importlib.util
+
+# Finds a usable Qt binding for the Qt versions of the app (V2.3+).
+# Trying every binding with full imports costs seconds on machines with half-installed
+# packages, so the winner is remembered in QT_BINDING_CACHE_FILE and tried first next time.
+# The cache is thrown away when the interpreter or its site-packages change.
+
+QT_BINDING_CACHE_FILE = "yt_downloader_qt_binding.json"
+QT_CANDIDATES = ("qtpy6", "qtpy", "PyQt6", "PySide6", "PyQt5", "PySide2")
+
+
+def _environment_fingerprint():
+    dirs = []
+    try:
+        dirs += site.getsitepackages()
+    except AttributeError:
+        # Some virtualenvs ship a site module without getsitepackages
+        pass
+    try:
+        dirs.append(site.getusersitepackages())
+    except AttributeError:
+        pass
+    # A directory's mtime changes whenever a package is installed into or removed from it
+    mtimes = {d: os.path.getmtime(d) for d in dirs if os.path.isdir(d)}
+    return {"executable": sys.executable, "version": sys.version, "site_packages": mtimes}
+
+
+def _read_cache(path, fingerprint):
+    try:
+        with open(path, "r") as f:
+            cached = json.load(f)
+        if cached.get("fingerprint") == fingerprint and cached.get("binding") in QT_CANDIDATES:
+            return cached["binding"]
+    except Exception:
+        pass
+    return None
+
+
+def _write_cache(path, fingerprint, binding):
+    try:
+        with open(path, "w") as f:
+            json.dump({"binding": binding, "fingerprint": fingerprint}, f, indent=4)
+    except Exception as e:
+        print(f"Failed to save Qt binding cache: {e}")
+
+
+# Returns (binding name, QtWidgets module, QtCore module, came_from_cache)
+def load_qt_binding(cache_path=QT_BINDING_CACHE_FILE):
+    fingerprint = _environment_fingerprint()
+    cached = _read_cache(cache_path, fingerprint)
+    order = [cached] + [pkg for pkg in QT_CANDIDATES if pkg != cached] if cached else list(QT_CANDIDATES)
+
+    tried = []
+    for pkg in order:
+        # find_spec only looks the package up on sys.path, it doesn't import anything
+        if pkg != cached and importlib.util.find_spec(pkg) is None:
+            continue
+        tried.append(pkg)
+        try:
+            widgets = importlib.import_module(f"{pkg}.QtWidgets")
+            core = importlib.import_module(f"{pkg}.QtCore")
+        except Exception:
+            continue
+        if pkg != cached:
+            _write_cache(cache_path, fingerprint, pkg)
+        return pkg, widgets, core, pkg == cached
+    raise ImportError(
+        "Could not find a Qt binding. Tried: " + (", ".join(tried) or "none installed") +
+        ". Install a shim or a Qt package: e.g. `pip install qtpy pyqt6` or `pip install pyside6 qtpy`."
+    )
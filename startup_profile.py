@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+
+# Startup timing for the Qt app. mark() records how long each stage took, report() prints
+# them once the window is painted. With --profile-startup the script is re-run under
+# `python -X importtime` and report() also prints the slowest imports from that log.
+# Only stdlib imports in here, this module is loaded before anything else.
+
+PROFILE_FLAG = "--profile-startup"
+IMPORTTIME_TOP = 15
+
+_last = time.perf_counter()
+_times = []
+_importtime_log = None
+_saved_stderr = None
+
+
+def mark(stage):
+    global _last
+    now = time.perf_counter()
+    _times.append((stage, now - _last))
+    _last = now
+
+
+def begin(argv):
+    global _importtime_log, _saved_stderr
+    if PROFILE_FLAG not in argv:
+        return
+    # Only needed when profiling, so a normal start doesn't pay for them
+    import tempfile
+    import subprocess
+    if "importtime" not in sys._xoptions:
+        # -X importtime can only be switched on when the interpreter starts
+        sys.exit(subprocess.call([sys.executable, "-X", "importtime"] + sys.argv))
+
+    # The interpreter writes one line per import straight to fd 2, park them in a temp file until report()
+    sys.stderr.flush()
+    _importtime_log = tempfile.TemporaryFile(mode="w+")
+    _saved_stderr = os.dup(2)
+    os.dup2(_importtime_log.fileno(), 2)
+
+
+def report():
+    total = sum(seconds for _, seconds in _times)
+    stages = ", ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in _times)
+    print(f"Startup: {total * 1000:.0f}ms to first paint ({stages})")
+    if _importtime_log is not None:
+        _print_importtime()
+
+
+def _print_importtime():
+    global _importtime_log, _saved_stderr
+    sys.stderr.flush()
+    os.dup2(_saved_stderr, 2)
+    os.close(_saved_stderr)
+    _importtime_log.seek(0)
+
+    # Lines look like "import time:   self_us |  cumulative_us | <2 spaces per nesting level>name"
+    top_level = []
+    for line in _importtime_log:
+        if not line.startswith("import time:"):
+            # Something else that was written to stderr meanwhile, pass it on
+            sys.stderr.write(line)
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2].rstrip("\n")
+        if name[1:2] != " ":
+            top_level.append((int(parts[1]), int(parts[0]), name.strip()))
+    _importtime_log.close()
+    _importtime_log = _saved_stderr = None
+
+    top_level.sort(reverse=True)
+    print("Slowest top-level imports before first paint (cumulative / self):")
+    for cumulative, self_us, name in top_level[:IMPORTTIME_TOP]:
+        print(f"  {cumulative / 1000:8.1f}ms {self_us / 1000:8.1f}ms  {name}")
@@ -5,6 +5,7 @@ from youtubesearchpython import VideosSearch
 import yt_dlp
 import os
 import threading
+import time
 
 BG = "#FFEBD8"
 
@@ -23,6 +24,9 @@ class YouTubePlayer(tk.Tk):
         self.search_button_image = PhotoImage(file="src-btn.png")
         self.search_button_image = self.search_button_image.subsample(4, 4)
 
+        # Results of the last search, row i of the listbox is search_results[i]
+        self.search_results = []
+
         # Entry for YouTube search
         self.search_entry = Entry(self, width=50)
         self.search_entry.grid(column=0, row=0, ipadx=10, ipady=5)
@@ -68,6 +72,7 @@ class YouTubePlayer(tk.Tk):
             try:
                 videos_search = VideosSearch(query, limit=10)
                 results = videos_search.result()['result']
+                self.search_results = [{'title': r['title'], 'link': r['link']} for r in results]
 
                 # Clear previous results from the listbox
                 self.results_listbox.delete(0, tk.END)
@@ -84,9 +89,8 @@ class YouTubePlayer(tk.Tk):
         if selected_index:
             try:
                 index = int(selected_index[0])
-                query = self.search_entry.get()
-                videos_search = VideosSearch(query, limit=10)
-                video_url = videos_search.result()['result'][index]['link']
+                # Resolve from the stored results instead of searching again, which could return a different list
+                video_url = self.search_results[index]['link']
 
                 # Start a new thread to download the video
                 threading.Thread(target=self.download_video, args=(video_url,)).start()
@@ -94,20 +98,39 @@ class YouTubePlayer(tk.Tk):
                 messagebox.showerror("Selection Error", f"An error occurred while selecting the video:\n{e}")
 
     def download_video(self, video_url):
+        ffmpeg_steps = []
+        started = {}
+
+        # Times every ffmpeg step that actually ran (merge, remux), shown under the list when done
+        def pp_hook(d):
+            if d['status'] == 'started':
+                started[d['postprocessor']] = time.perf_counter()
+            elif d['status'] == 'finished' and d['postprocessor'] in started:
+                seconds = time.perf_counter() - started.pop(d['postprocessor'])
+                if d['postprocessor'].startswith('FFmpeg'):
+                    ffmpeg_steps.append((d['postprocessor'][len('FFmpeg'):], seconds))
+
         try:
             ydl_opts = {
                 'format': 'bestvideo+bestaudio/best',  # Best video and audio
                 'outtmpl': '%(title)s.%(ext)s',  # Output file name based on video title
+                # Remux instead of FFmpegVideoConvertor: the merge already gives an mp4, and when it doesn't
+                # (single webm/mkv download) the streams are copied into mp4 instead of re-encoding the video.
+                # yt-dlp skips the remux entirely when the file is already mp4.
                 'postprocessors': [{
-                    'key': 'FFmpegVideoConvertor',
-                    'preferedformat': 'mp4',  # Convert to MP4
+                    'key': 'FFmpegVideoRemuxer',
+                    'preferedformat': 'mp4',
                 }],
                 'merge_output_format': 'mp4',  # Ensure merged format is MP4
+                'postprocessor_hooks': [pp_hook],
             }
 
             # Initialize yt-dlp with the options
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 ydl.download(video_url)
+            steps = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in ffmpeg_steps) or "none needed"
+            summary = f"Download complete! ffmpeg: {steps}"
+            self.after(0, lambda: self.warn_label.config(text=summary))
         except Exception as e:
             messagebox.showerror("Download Error", f"An error occurred while downloading the video:\n{e}")
 
@@ -0,0 +1,128 @@
+import sys
+import json
+import time
+import argparse
+
+from yt_engine import DownloadEngine, SETTINGS_FILE, DOWNLOAD_FORMATS, JOB_DONE, JOB_SKIPPED, load_settings
+
+# Headless front end for yt_engine: downloads a list of URLs and/or the top hit of each search
+# query with the GUI's settings JSON, then prints a JSON summary on stdout. No Qt involved.
+
+
+def read_lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch YouTube downloader (no GUI).")
+    parser.add_argument("urls", nargs="*", help="video URLs to download")
+    parser.add_argument("-u", "--url-file", help="file with one URL per line")
+    parser.add_argument("-q", "--query-file", help="file with one search query per line, the top result is downloaded")
+    parser.add_argument("-p", "--playlist", action="append", default=[],
+                        help="playlist or channel URL, every video in it is downloaded (repeatable)")
+    parser.add_argument("-f", "--format", choices=DOWNLOAD_FORMATS, help="overrides download_format from the settings")
+    parser.add_argument("-o", "--output-dir", help="overrides output_dir from the settings")
+    parser.add_argument("--postprocess-workers", type=int,
+                        help="overrides postprocess_workers (parallel ffmpeg runs) from the settings")
+    parser.add_argument("--audio-floor", type=int,
+                        help="overrides audio_min_kbps (smallest acceptable audio bitrate) from the settings")
+    parser.add_argument("--max-height", type=int, help="overrides max_height (mp4 resolution cap) from the settings")
+    parser.add_argument("-j", "--concurrency", type=int, help="overrides max_concurrent_downloads from the settings")
+    parser.add_argument("--resume", action="store_true",
+                        help="also run the unfinished jobs journaled by an earlier (interrupted) run or the GUI")
+    parser.add_argument("--force", action="store_true", help="download again even if the archive has the video")
+    parser.add_argument("--settings", default=SETTINGS_FILE, help=f"settings JSON (default: {SETTINGS_FILE})")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show yt-dlp's own output on stdout")
+    args = parser.parse_args(argv)
+
+    urls = list(args.urls)
+    if args.url_file:
+        urls += read_lines(args.url_file)
+    queries = read_lines(args.query_file) if args.query_file else []
+    if not urls and not queries and not args.playlist and not args.resume:
+        parser.error("nothing to download, pass URLs, --url-file, --query-file, --playlist or --resume")
+
+    settings = load_settings(args.settings)
+    if args.format:
+        settings["download_format"] = args.format
+    if args.output_dir:
+        settings["output_dir"] = args.output_dir
+    if args.concurrency:
+        settings["max_concurrent_downloads"] = args.concurrency
+    if args.postprocess_workers is not None:
+        settings["postprocess_workers"] = args.postprocess_workers
+    if args.audio_floor is not None:
+        settings["audio_min_kbps"] = args.audio_floor
+    if args.max_height is not None:
+        settings["max_height"] = args.max_height
+    if args.force:
+        settings["skip_archived"] = False
+
+    # stdout is reserved for the summary unless --verbose
+    engine = DownloadEngine(settings, args.settings, quiet=not args.verbose)
+    engine.on_job_changed = lambda job: print(f"[{job.state}] {job.title}", file=sys.stderr, flush=True)
+    started = time.time()
+
+    if args.resume:
+        resumed = engine.recover()
+        print(f"Resuming {len(resumed)} unfinished jobs", file=sys.stderr, flush=True)
+    for url in urls:
+        engine.submit(url)
+
+    lookup_errors = []
+    for playlist in args.playlist:
+        # Jobs are submitted page by page, downloads start while the rest is still being listed
+        entries = engine.iter_playlist(playlist)
+        batch = []
+        try:
+            for entry in entries:
+                batch.append(entry)
+                if len(batch) >= 50:
+                    engine.submit_all(batch)
+                    batch = []
+            engine.submit_all(batch)
+        except Exception as e:
+            lookup_errors.append({"playlist": playlist, "error": str(e)})
+        finally:
+            entries.close()
+
+    for query in queries:
+        results = engine.iter_search(query, 1)
+        try:
+            entry = next(results, None)
+        except Exception as e:
+            entry = None
+            lookup_errors.append({"query": query, "error": str(e)})
+        finally:
+            results.close()
+        if entry:
+            engine.submit(entry['url'], entry['title'])
+        elif not lookup_errors or lookup_errors[-1].get("query") != query:
+            lookup_errors.append({"query": query, "error": "no results"})
+
+    engine.wait()
+    # Utilization over the whole run, per stage
+    stages = engine.stage_stats()
+    engine.close()
+
+    jobs = [job.summary() for job in engine.jobs]
+    counts = {}
+    for job in jobs:
+        counts[job["state"]] = counts.get(job["state"], 0) + 1
+    summary = {
+        "elapsed_seconds": round(time.time() - started, 2),
+        "total": len(jobs),
+        "counts": counts,
+        "lookup_errors": lookup_errors,
+        "stages": stages,
+        "jobs": jobs,
+    }
+    json.dump(summary, sys.stdout, indent=2)
+    print()
+    ok = not lookup_errors and all(job["state"] in (JOB_DONE, JOB_SKIPPED) for job in jobs)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1665 @@
+import os
+import glob
+import json
+import time
+import heapq
+import random
+import shutil
+import sys
+import sqlite3
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict, deque
+from urllib.parse import urlparse, parse_qs
+from contextlib import contextmanager
+
+# GUI-free search/download core. V2.4.py is a thin Qt client of this module and
+# yt_batch.py drives it from the command line, both share the same settings JSON.
+# yt_dlp is only imported on first use (or by warm_up()), importing this module is cheap.
+# The same goes for urllib.request and subprocess, they are imported where they're used.
+
+SETTINGS_FILE = "yt_downloader_settings.json"
+
+DEFAULT_SETTINGS = {
+    "output_dir": None,  # None means the current working directory
+    "search_limit": 10,
+    "download_format": "mp4",
+    "max_concurrent_downloads": 2,
+    "concurrent_fragments": 4,  # per job, for DASH/HLS formats
+    "external_downloader": "native",  # or "aria2c"
+    "max_connections": 16,  # across all jobs
+    "bandwidth_limit_kbps": 0,  # across all jobs, 0 means unlimited
+    "bandwidth_schedule": [],  # [{"start": "09:00", "end": "17:00", "limit_kbps": 2000}, ...]
+    "skip_archived": True,  # don't download videos the archive says are already on disk
+    "max_height": 0,  # mp4 resolution cap in pixels, 0 means no cap
+    "max_bitrate_kbps": 0,  # mp4 video bitrate cap, 0 means no cap
+    "max_retries": 4,  # for throttling and network errors, the other kinds fail straight away
+    "postprocess_workers": 0,  # parallel ffmpeg runs, 0 means one per CPU core
+    "audio_min_kbps": 128,  # audio formats take the smallest stream at or above this, 0 means the best one
+    "strict_audio_only": True,  # never fall back to a muxed video stream for audio formats
+    "keep_native_audio": False,  # keep the downloaded file as is when its codec suits the format
+}
+
+EXTERNAL_DOWNLOADERS = ("native", "aria2c")
+
+# Search results are cached next to the settings file
+SEARCH_CACHE_FILE = "yt_downloader_search_cache.json"
+SEARCH_CACHE_TTL = 15 * 60  # fresh for 15 minutes
+SEARCH_CACHE_MAX_STALE = 24 * 60 * 60  # after that, shown instantly but refreshed in the background
+SEARCH_CACHE_MAX_ENTRIES = 200
+
+# Every finished download is recorded here, next to the settings file
+ARCHIVE_FILE = "yt_downloader_archive.sqlite3"
+ARCHIVE_HASH_BYTES = 64 * 1024  # read from each end of the file for the quick hash
+
+# Unfinished jobs survive a restart through this journal, also next to the settings file
+JOURNAL_FILE = "yt_downloader_jobs.sqlite3"
+
+# Result thumbnails, one small jpg per video id, oldest dropped past the size cap
+THUMBNAIL_DIR = "yt_downloader_thumbnails"
+THUMBNAIL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+THUMBNAIL_URL = "https://i.ytimg.com/vi/{}/mqdefault.jpg"  # 320x180
+
+SEARCH_OPTIONS = {'quiet': True, 'extract_flat': True, 'skip_download': True}
+# Playlists and channels are listed without resolving each video, one page at a time
+PLAYLIST_OPTIONS = {'quiet': True, 'extract_flat': 'in_playlist', 'skip_download': True}
+
+# Format lists of selected videos, kept in memory per video id
+FORMAT_CACHE_TTL = 60 * 60
+FORMAT_CACHE_MAX_ENTRIES = 500
+# noplaylist: 'watch?v=X&list=Y' means video X here, playlists are expanded by iter_playlist
+PROBE_OPTIONS = {'quiet': True, 'skip_download': True, 'noplaylist': True}
+
+
+# --- Settings JSON ---
+def load_settings(path=SETTINGS_FILE):
+    settings = dict(DEFAULT_SETTINGS)
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                settings.update(json.load(f))
+        except Exception as e:
+            print(f"Failed to load settings: {e}", file=sys.stderr)
+    if not settings["output_dir"]:
+        settings["output_dir"] = os.getcwd()
+    return settings
+
+
+def save_settings(settings, path=SETTINGS_FILE):
+    try:
+        with open(path, "w") as f:
+            json.dump(settings, f, indent=4)
+    except Exception as e:
+        print(f"Failed to save settings: {e}", file=sys.stderr)
+
+
+# --- Helpers ---
+def format_bytes(n):
+    n = float(n or 0)
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+# The id is what the archive is keyed on, None for URLs that aren't a single YouTube video
+def video_id_from_url(url):
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.endswith("youtu.be"):
+        return parsed.path.strip("/").split("/")[0] or None
+    if "youtube" in host:
+        if parsed.path == "/watch":
+            return parse_qs(parsed.query).get("v", [None])[0]
+        for prefix in ("/shorts/", "/embed/", "/live/"):
+            if parsed.path.startswith(prefix):
+                return parsed.path[len(prefix):].split("/")[0] or None
+    return None
+
+
+# Anything pasted into the search bar that looks like a link is listed instead of searched for
+# Watch URL for a YouTube result, whatever URL its extractor gave for anything else.
+# Flat entries carry ie_key, results of extract_info carry extractor_key.
+def result_url(result, fallback=None):
+    if (result.get('ie_key') or result.get('extractor_key')) == 'Youtube' and result.get('id'):
+        return f"https://www.youtube.com/watch?v={result['id']}"
+    return result.get('webpage_url') or result.get('url') or fallback
+
+
+def is_url(text):
+    text = text.strip().lower()
+    return text.startswith(("http://", "https://", "www.", "youtube.com/", "youtu.be/", "m.youtube.com/"))
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return ""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+# --- Search cache ---
+# On-disk LRU of ytsearch results keyed on (query, limit). Fresh entries are answered directly,
+# stale ones (older than ttl but younger than max_stale) are answered and revalidated by the caller.
+class SearchCache:
+    def __init__(self, path, ttl=SEARCH_CACHE_TTL, max_stale=SEARCH_CACHE_MAX_STALE, max_entries=SEARCH_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self._load()
+
+    @staticmethod
+    def make_key(query, limit):
+        return f"{limit}:{' '.join(query.lower().split())}"
+
+    # Returns (entries, fresh), entries is None on a miss
+    def get(self, query, limit):
+        key = self.make_key(query, limit)
+        with self._lock:
+            item = self._items.get(key)
+            age = time.time() - item["time"] if item else None
+            if item is None or age > self.max_stale:
+                self._items.pop(key, None)
+                self.misses += 1
+                return None, False
+            self._items.move_to_end(key)
+            self.saved_seconds += item.get("cost", 0.0)
+            if age <= self.ttl:
+                self.hits += 1
+                return item["entries"], True
+            self.stale_hits += 1
+            return item["entries"], False
+
+    def put(self, query, limit, entries, cost=0.0):
+        with self._lock:
+            key = self.make_key(query, limit)
+            self._items[key] = {"time": time.time(), "cost": cost, "entries": entries}
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+            self._save()
+
+    def stats_text(self):
+        return f"Cache: {self.hits} hits, {self.stale_hits} stale, {self.misses} misses, ~{self.saved_seconds:.1f}s saved"
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                self._items = OrderedDict(json.load(f))
+        except Exception:
+            self._items = OrderedDict()
+
+    def _save(self):
+        try:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self._items, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"Failed to save search cache: {e}", file=sys.stderr)
+
+
+# --- Download archive ---
+# What has been downloaded where, keyed on (video id, format) so an mp3 and an mp4 of the same
+# video are separate entries. Lookups go through the primary key index and only stat the file,
+# so they stay cheap with hundreds of thousands of rows.
+def quick_hash(path):
+    size = os.path.getsize(path)
+    h = hashlib.sha1(str(size).encode())
+    with open(path, "rb") as f:
+        h.update(f.read(ARCHIVE_HASH_BYTES))
+        if size > ARCHIVE_HASH_BYTES:
+            f.seek(max(ARCHIVE_HASH_BYTES, size - ARCHIVE_HASH_BYTES))
+            h.update(f.read(ARCHIVE_HASH_BYTES))
+    return h.hexdigest()
+
+
+class DownloadArchive:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # One connection shared by the worker threads, the lock serialises them
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS downloads ("
+                " video_id TEXT NOT NULL, format TEXT NOT NULL, path TEXT NOT NULL,"
+                " size INTEGER NOT NULL, hash TEXT NOT NULL, time REAL NOT NULL, height INTEGER,"
+                " PRIMARY KEY (video_id, format))"
+            )
+            # Archives from before the resolution picker have no height column, their rows count as Auto
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(downloads)")]
+            if "height" not in columns:
+                self._db.execute("ALTER TABLE downloads ADD COLUMN height INTEGER")
+
+    # Returns the archived row as a dict if the file is still there with the recorded size,
+    # rows whose file is gone or changed are dropped. deep=True also recomputes the quick hash.
+    # height is the resolution picked for the download, None for Auto, and has to match too.
+    def lookup(self, video_id, fmt, deep=False, height=None):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT path, size, hash, time FROM downloads WHERE video_id = ? AND format = ? AND height IS ?",
+                (video_id, fmt, height),
+            ).fetchone()
+        if row is None:
+            return None
+        entry = {"video_id": video_id, "format": fmt, "path": row[0], "size": row[1], "hash": row[2], "time": row[3]}
+        try:
+            intact = os.path.getsize(entry["path"]) == entry["size"]
+            if intact and deep:
+                intact = quick_hash(entry["path"]) == entry["hash"]
+        except OSError:
+            intact = False
+        if not intact:
+            self.forget(video_id, fmt)
+            return None
+        return entry
+
+    def record(self, video_id, fmt, path, height=None):
+        size = os.path.getsize(path)
+        digest = quick_hash(path)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO downloads (video_id, format, path, size, hash, time, height) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (video_id, fmt, os.path.abspath(path), size, digest, time.time(), height),
+            )
+
+    def forget(self, video_id, fmt):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM downloads WHERE video_id = ? AND format = ?", (video_id, fmt))
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM downloads").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# --- Format probing ---
+# Per video id, entries older than ttl are probed again
+class FormatCache:
+    def __init__(self, ttl=FORMAT_CACHE_TTL, max_entries=FORMAT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def get(self, video_id):
+        with self._lock:
+            item = self._items.get(video_id)
+            if item is None or time.time() - item[0] > self.ttl:
+                self._items.pop(video_id, None)
+                return None
+            self._items.move_to_end(video_id)
+            return item[1]
+
+    def put(self, video_id, formats):
+        with self._lock:
+            self._items[video_id] = (time.time(), formats)
+            self._items.move_to_end(video_id)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+
+# The fields the format picker shows, video formats only, highest resolution first
+def summarize_formats(raw_formats):
+    formats = []
+    for f in raw_formats or []:
+        if not f.get('height') or (f.get('vcodec') or 'none') == 'none':
+            continue
+        formats.append({
+            'format_id': f.get('format_id'),
+            'ext': f.get('ext'),
+            'height': f['height'],
+            'fps': f.get('fps'),
+            'vcodec': (f.get('vcodec') or '').split('.')[0],
+            'tbr': f.get('tbr') or f.get('vbr'),
+            'filesize': f.get('filesize') or f.get('filesize_approx'),
+        })
+    formats.sort(key=lambda f: (f['height'], f['tbr'] or 0), reverse=True)
+    return formats
+
+
+# One format per height, the one mp4_format(height, ..., exact_height=True) downloads:
+# avc1 first, then any mp4, then the best of the rest. `formats` is summarize_formats() order.
+def formats_by_height(formats, max_bitrate_kbps=0):
+    picked = {}
+    for f in formats:
+        if max_bitrate_kbps and f['tbr'] and f['tbr'] > max_bitrate_kbps:
+            continue
+        rank = 0 if f['vcodec'] == 'avc1' else 1 if f['ext'] == 'mp4' else 2
+        if f['height'] not in picked or rank < picked[f['height']][0]:
+            picked[f['height']] = (rank, f)
+    return [f for _, f in sorted(picked.values(), key=lambda item: item[1]['height'], reverse=True)]
+
+
+def format_label(f):
+    parts = [f"{f['height']}p", f['vcodec'] or f['ext']]
+    if f['fps']:
+        parts.append(f"{f['fps']:.0f}fps")
+    if f['tbr']:
+        parts.append(f"{f['tbr']:.0f} kbps")
+    if f['filesize']:
+        parts.append(format_bytes(f['filesize']))
+    return " | ".join(parts)
+
+
+# --- Thumbnails ---
+# Disk cache of thumbnail bytes keyed on video id. Files are touched on every hit, so their
+# mtime doubles as the LRU order when the directory grows past max_bytes.
+class ThumbnailStore:
+    def __init__(self, directory, max_bytes=THUMBNAIL_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total = None
+
+    def path(self, video_id):
+        return os.path.join(self.directory, video_id + ".jpg")
+
+    # Returns the jpg bytes, downloading them on a miss. Blocks, call it off the GUI thread.
+    def get(self, video_id):
+        path = self.path(video_id)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            pass
+        from urllib.request import urlopen
+        with urlopen(THUMBNAIL_URL.format(video_id), timeout=10) as response:
+            data = response.read()
+        self._put(path, data)
+        return data
+
+    def _put(self, path, data):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Failed to cache thumbnail: {e}", file=sys.stderr)
+            return
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _, size, _ in self._files())
+            else:
+                self._total += len(data)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _files(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".jpg"):
+                st = entry.stat()
+                files.append((st.st_mtime, st.st_size, entry.path))
+        return files
+
+    # Down to 90% of the cap so a full cache doesn't evict on every new thumbnail
+    def _evict(self):
+        for mtime, size, path in sorted(self._files()):
+            if self._total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+                self._total -= size
+            except OSError:
+                pass
+
+
+# --- mp4 post-processing ---
+# The network stage downloads the video and audio streams as separate files (the `,` in the
+# selector) and leaves the merge to the ffmpeg stage. Streams that can be stream-copied into
+# mp4 are preferred on both sides, so the merge is a plain `-c copy` and the video is never
+# re-encoded. The caps only apply to the video; `<=?` lets formats that don't report a value
+# through, and the final unfiltered `b` means a cap never makes a download fail outright.
+# exact_height: a resolution picked from the probed list. YouTube's avc1 streams stop at 1080p,
+# so that height is matched first in any codec and the avc1 preference only applies below it.
+def mp4_format(max_height=0, max_bitrate_kbps=0, exact_height=False):
+    caps = ''
+    if max_height:
+        caps += f'[height<=?{int(max_height)}]'
+    if max_bitrate_kbps:
+        caps += f'[tbr<=?{int(max_bitrate_kbps)}]'
+    video = f'bv[vcodec^=avc1]{caps}/bv[ext=mp4]{caps}/bv{caps}/b{caps}'
+    if max_height and exact_height:
+        exact = f'[height={int(max_height)}]' + (f'[tbr<=?{int(max_bitrate_kbps)}]' if max_bitrate_kbps else '')
+        video = f'bv[vcodec^=avc1]{exact}/bv[ext=mp4]{exact}/bv{exact}/' + video
+    audio = 'ba[acodec^=mp4a]/ba[ext=m4a]/ba'
+    return f'({video}/b),({audio})' if caps else f'({video}),({audio})'
+
+
+MP4_FORMAT = mp4_format()
+# Audio codecs mp4 players handle, anything else gets transcoded to AAC
+MP4_AUDIO_CODECS = ('mp4a', 'aac', 'mp3', 'ac-3', 'ec-3')
+
+
+# --- Audio extraction ---
+# Output format -> (source codecs copied as they are, ffmpeg encoder args for everything else)
+AUDIO_OUTPUTS = {
+    "mp3": (('mp3',), ['-c:a', 'libmp3lame', '-b:a', '192k']),
+    "opus": (('opus',), ['-c:a', 'libopus', '-b:a', '160k']),
+    "m4a": (('mp4a', 'aac'), ['-c:a', 'aac', '-b:a', '192k']),
+    "flac": (('flac',), ['-c:a', 'flac']),
+}
+AUDIO_FORMATS = tuple(AUDIO_OUTPUTS)
+DOWNLOAD_FORMATS = ("mp4",) + AUDIO_FORMATS
+
+# Streams in the codec the output wants come first, so most opus/m4a jobs are a plain copy
+AUDIO_PREFERRED = {
+    "opus": '[acodec=opus]',
+    "m4a": '[acodec^=mp4a]',
+}
+
+
+# Audio-only selector: the smallest stream at or above min_kbps (preferring the output's own
+# codec), else the best audio-only stream. Only without `strict` may it end up on a muxed
+# video+audio stream, which downloads the whole video just to throw the picture away.
+def audio_format(fmt, min_kbps=0, strict=True):
+    preferred = AUDIO_PREFERRED.get(fmt, '')
+    if min_kbps:
+        floor = f'[abr>={int(min_kbps)}]'
+        selectors = [f'worstaudio{preferred}{floor}', f'worstaudio{floor}'] if preferred else [f'worstaudio{floor}']
+    else:
+        selectors = [f'bestaudio{preferred}'] if preferred else []
+    selectors.append('bestaudio')
+    if not strict:
+        selectors.append('best')
+    return '/'.join(selectors)
+
+
+# True when the stream's codec can go into `fmt` without re-encoding
+def audio_passthrough(stream, fmt):
+    return (stream[2] or '').startswith(AUDIO_OUTPUTS[fmt][0])
+
+
+# Audio extraction throughput: minutes of audio out per second of wall time during which at
+# least one extraction was running, so parallel encodes count towards the same second
+class EncodeMeter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.audio_seconds = 0.0
+        self.files = 0
+        self._wall = 0.0
+        self._active = 0
+        self._since = None
+
+    def start(self):
+        with self._lock:
+            if self._active == 0:
+                self._since = time.monotonic()
+            self._active += 1
+
+    def finish(self, audio_seconds):
+        with self._lock:
+            self._active -= 1
+            self.audio_seconds += audio_seconds or 0
+            self.files += 1 if audio_seconds is not None else 0
+            if self._active == 0:
+                self._wall += time.monotonic() - self._since
+
+    def stats(self):
+        with self._lock:
+            wall = self._wall + (time.monotonic() - self._since if self._active else 0.0)
+            minutes = self.audio_seconds / 60
+            return {"files": self.files, "audio_minutes": round(minutes, 2), "wall_seconds": round(wall, 2),
+                    "audio_minutes_per_second": round(minutes / wall, 2) if wall else 0.0}
+
+
+# (path, vcodec, acodec) of every stream extract_info(download=True) left on disk. Taken from
+# its result rather than the progress hook, which yt-dlp skips for files that already exist.
+# A playlist URL only gets its first video, a job is one video.
+def downloaded_streams(info):
+    if info and not info.get('requested_downloads') and info.get('entries'):
+        info = next((e for e in info['entries'] if e), None)
+    streams = []
+    for d in (info or {}).get('requested_downloads') or []:
+        path = d.get('filepath') or d.get('filename')
+        if path and path not in (p for p, _, _ in streams):
+            streams.append((path, d.get('vcodec'), d.get('acodec')))
+    return streams
+
+
+def ffmpeg_executable():
+    return shutil.which("ffmpeg") or "ffmpeg"
+
+
+# ffmpeg arguments (after the executable) that turn the downloaded `streams`, a list of
+# (path, vcodec, acodec), into `out_path`. None when the only stream can simply be renamed.
+# The mp4 merge is a stream copy, audio is transcoded only when mp4 can't hold it.
+def postprocess_args(streams, fmt, out_path):
+    # A codec of None means yt-dlp didn't say (some extractors, generic URLs), unlike 'none'.
+    # Unknown streams stand in when no stream is known to carry video/audio, and unknown audio
+    # is transcoded rather than copied.
+    video = (next((s for s in streams if s[1] not in (None, 'none')), None)
+             or next((s for s in streams if s[1] is None), None))
+    audio = (next((s for s in streams if s[2] not in (None, 'none') and s is not video), None)
+             or next((s for s in streams if s[2] is None and s is not video), None))
+    if fmt in AUDIO_OUTPUTS:
+        source = audio or video or streams[0]
+        if audio_passthrough(source, fmt):
+            if source[0].endswith('.' + fmt):
+                # Right codec in the right container already
+                return None
+            return ['-y', '-i', source[0], '-vn', '-c:a', 'copy', out_path]
+        return ['-y', '-i', source[0], '-vn'] + AUDIO_OUTPUTS[fmt][1] + [out_path]
+
+    if video is None:
+        raise ValueError("no video stream was downloaded")
+    acodec = (audio or video)[2]
+    if audio is None and video[0].endswith('.mp4') and (acodec == 'none' or (acodec or '').startswith(MP4_AUDIO_CODECS)):
+        return None
+    args = ['-y', '-i', video[0]]
+    if audio:
+        args += ['-i', audio[0], '-map', '0:v:0', '-map', '1:a:0']
+    else:
+        args += ['-map', '0']
+    args += ['-c', 'copy']
+    if acodec != 'none' and not (acodec or '').startswith(MP4_AUDIO_CODECS):
+        args += ['-c:a', 'aac', '-b:a', '192k']
+    return args + [out_path]
+
+
+# --- yt-dlp session pool ---
+# Building a YoutubeDL sets up every extractor, the cookie jar and the HTTP opener, and throws
+# away keep-alive connections when it is closed. Instead instances are kept warm per option
+# profile (search, mp4, mp3, ...) and checked out by one thread at a time.
+class _PooledSession:
+    def __init__(self, ydl_opts):
+        self.progress_hook = None
+        self.pp_hook = None
+        opts = dict(ydl_opts)
+        # The instance outlives a single job, so its hooks forward to whoever has it checked out
+        opts['progress_hooks'] = [self._on_progress]
+        opts['postprocessor_hooks'] = [self._on_pp]
+        import yt_dlp
+        self.ydl = yt_dlp.YoutubeDL(opts)
+
+    def _on_progress(self, d):
+        if self.progress_hook:
+            self.progress_hook(d)
+
+    def _on_pp(self, d):
+        if self.pp_hook:
+            self.pp_hook(d)
+
+    def close(self):
+        try:
+            self.ydl.close()
+        except Exception:
+            pass
+
+
+class YdlSessionPool:
+    def __init__(self, max_idle_per_profile=4):
+        self.max_idle_per_profile = max_idle_per_profile
+        self._lock = threading.Lock()
+        self._idle = {}
+
+    # `params` are per-checkout overrides, written onto the instance's params for this use only
+    @contextmanager
+    def session(self, profile, ydl_opts, progress_hook=None, pp_hook=None, params=None):
+        with self._lock:
+            idle = self._idle.get(profile)
+            pooled = idle.pop() if idle else None
+        if pooled is None:
+            pooled = _PooledSession(ydl_opts)
+        saved_params = {key: pooled.ydl.params.get(key) for key in params or ()}
+        saved_selector = pooled.ydl.format_selector
+        if params and 'format' in params and params['format'] != pooled.ydl.params.get('format'):
+            # YoutubeDL compiles params['format'] once in __init__ and only uses the compiled
+            # selector, so a different format needs its own selector for this checkout
+            pooled.ydl.format_selector = pooled.ydl.build_format_selector(params['format'])
+        pooled.ydl.params.update(params or {})
+        pooled.progress_hook = progress_hook
+        pooled.pp_hook = pp_hook
+        reusable = True
+        try:
+            yield pooled.ydl
+        except GeneratorExit:
+            # A search generator was closed early, the session itself is fine
+            raise
+        except BaseException:
+            # Don't hand a session that blew up mid-operation to the next job
+            reusable = False
+            raise
+        finally:
+            pooled.progress_hook = None
+            pooled.pp_hook = None
+            pooled.ydl.params.update(saved_params)
+            pooled.ydl.format_selector = saved_selector
+            self._release(profile, pooled, reusable)
+
+    def _release(self, profile, pooled, reusable):
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(profile, [])
+                if len(idle) < self.max_idle_per_profile:
+                    idle.append(pooled)
+                    return
+        pooled.close()
+
+    def close_all(self):
+        with self._lock:
+            sessions = [p for idle in self._idle.values() for p in idle]
+            self._idle.clear()
+        for pooled in sessions:
+            pooled.close()
+
+
+# --- Download scheduling ---
+JOB_QUEUED = "queued"
+JOB_DOWNLOADING = "downloading"
+JOB_POSTPROCESS_QUEUED = "waiting for ffmpeg"  # downloaded, queued for the ffmpeg stage
+JOB_MERGING = "merging"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_PAUSED = "paused"
+JOB_CANCELLED = "cancelled"
+JOB_SKIPPED = "skipped"  # already in the download archive
+JOB_RETRY_WAIT = "retry wait"  # backing off before the next attempt, holds no worker
+
+# Jobs in these states aren't finished yet
+ACTIVE_STATES = (JOB_QUEUED, JOB_DOWNLOADING, JOB_POSTPROCESS_QUEUED, JOB_MERGING, JOB_RETRY_WAIT)
+
+# Set on DownloadJob.control by the client, picked up by the job's progress hook
+CONTROL_PAUSE = "pause"
+CONTROL_CANCEL = "cancel"
+
+
+# Raised from inside the progress hook to unwind yt-dlp when a job is paused or cancelled
+class JobInterrupted(Exception):
+    pass
+
+
+class DownloadJob:
+    # Slots keep a few hundred queued jobs cheap
+    __slots__ = (
+        "id", "url", "title", "fmt", "output_dir", "priority", "state", "error",
+        "downloaded", "total", "speed", "eta", "fragment", "fragments",
+        "control", "files", "weight", "seen_bytes", "video_id", "path",
+        "max_height", "journal_id", "error_kind", "attempts", "retry_timer",
+        "streams", "process", "duration", "external",
+    )
+    _next_id = itertools.count(1)
+
+    def __init__(self, url, title, fmt, output_dir, priority=0, weight=1, max_height=None):
+        self.id = next(DownloadJob._next_id)
+        self.url = url
+        self.title = title
+        self.fmt = fmt
+        self.output_dir = output_dir
+        self.priority = priority
+        self.state = JOB_QUEUED
+        self.error = None
+        self.downloaded = 0
+        self.total = 0
+        self.speed = 0
+        self.eta = None
+        self.fragment = None
+        self.fragments = None
+        self.control = None
+        # Every file yt-dlp wrote for this job, used to clean up after a cancel
+        self.files = set()
+        # Share of the bandwidth cap relative to the other running jobs
+        self.weight = max(1, int(weight))
+        # Last downloaded_bytes per file, turns the hook's running totals into deltas for the governor
+        self.seen_bytes = {}
+        self.video_id = video_id_from_url(url)
+        # Final file after post-processing
+        self.path = None
+        # Resolution picked for this job, None falls back to the max_height setting
+        self.max_height = max_height
+        # Row in the JobJournal
+        self.journal_id = None
+        # classify_error() of the last failure, and how many retries it has had so far
+        self.error_kind = None
+        self.attempts = 0
+        self.retry_timer = None
+        # (path, vcodec, acodec) of every stream the network stage downloaded
+        self.streams = []
+        # The running ffmpeg, so a cancel can stop it
+        self.process = None
+        # External downloader fetching this job, None for yt-dlp's own. aria2c only reports back
+        # once a file is done, so there is no progress and nothing to pause or cancel until then
+        self.external = None
+        # Seconds of media, from yt-dlp's info
+        self.duration = None
+
+    def summary(self):
+        return {"url": self.url, "title": self.title, "format": self.fmt, "state": self.state,
+                "bytes": self.downloaded, "path": self.path, "error": self.error,
+                "error_kind": self.error_kind, "attempts": self.attempts}
+
+
+class DownloadScheduler:
+    # Bounded worker pool: at most `concurrency` jobs run at once, the rest wait in the queue.
+    # Higher priority jobs are picked first, jobs with the same priority run in FIFO order.
+    def __init__(self, run_job, concurrency=2, on_error=None):
+        self.run_job = run_job
+        # Called with (job, exception) when run_job raises, so the owner can fail the job properly
+        self.on_error = on_error
+        self.concurrency = 0
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._workers = 0
+        # For stats(): start time of every job being run, busy seconds of the finished ones
+        self._running = {}
+        self._busy_time = 0.0
+        self._stats_at = time.monotonic()
+        self._stats_busy = 0.0
+        self.set_concurrency(concurrency)
+
+    def submit(self, job):
+        with self._cond:
+            heapq.heappush(self._heap, (-job.priority, next(self._seq), job))
+            self._cond.notify()
+
+    def set_concurrency(self, n):
+        with self._cond:
+            self.concurrency = max(1, int(n))
+            while self._workers < self.concurrency:
+                self._workers += 1
+                threading.Thread(target=self._worker, daemon=True).start()
+            # Surplus workers retire after their current job
+            self._cond.notify_all()
+
+    def remove(self, job):
+        with self._cond:
+            kept = [item for item in self._heap if item[2] is not job]
+            if len(kept) == len(self._heap):
+                return False
+            self._heap = kept
+            heapq.heapify(self._heap)
+            return True
+
+    def pending(self):
+        with self._cond:
+            return len(self._heap)
+
+    # Queue depth, busy workers and the share of worker time spent on jobs since the last call
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            busy_time = self._busy_time + sum(now - started for started in self._running.values())
+            elapsed = now - self._stats_at
+            utilization = (busy_time - self._stats_busy) / (elapsed * self.concurrency) if elapsed > 0 else 0.0
+            self._stats_at, self._stats_busy = now, busy_time
+            return {"queued": len(self._heap), "busy": len(self._running), "workers": self.concurrency,
+                    "utilization": round(min(1.0, utilization), 3)}
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._heap and self._workers <= self.concurrency:
+                    self._cond.wait()
+                if self._workers > self.concurrency:
+                    self._workers -= 1
+                    return
+                job = heapq.heappop(self._heap)[2]
+                self._running[job.id] = time.monotonic()
+            try:
+                self.run_job(job)
+            except Exception as e:
+                try:
+                    if self.on_error is None:
+                        raise
+                    self.on_error(job, e)
+                except Exception:
+                    # Last resort, the worker thread itself has to survive
+                    job.state = JOB_FAILED
+                    job.error = str(e)
+            finally:
+                with self._cond:
+                    self._busy_time += time.monotonic() - self._running.pop(job.id)
+
+
+# Caps the HTTP connections open across all jobs. A job asks for its fragment concurrency and
+# gets whatever is left (at least one), it only waits when the whole budget is in use.
+class ConnectionBudget:
+    def __init__(self, limit):
+        self.limit = max(1, int(limit))
+        self.in_use = 0
+        self._cond = threading.Condition()
+
+    def set_limit(self, limit):
+        with self._cond:
+            self.limit = max(1, int(limit))
+            self._cond.notify_all()
+
+    def acquire(self, want):
+        with self._cond:
+            while self.in_use >= self.limit:
+                self._cond.wait()
+            granted = max(1, min(int(want), self.limit - self.in_use))
+            self.in_use += granted
+            return granted
+
+    def release(self, n):
+        with self._cond:
+            self.in_use -= n
+            self._cond.notify_all()
+
+
+# --- Bandwidth ---
+BANDWIDTH_BURST_SECONDS = 1.0  # unused allowance a job may save up
+BANDWIDTH_STALL_SECONDS = 3.0  # jobs quiet for longer than this give their share to the others
+BANDWIDTH_MAX_SLEEP = 2.0  # per hook call, keeps pause/cancel responsive
+
+
+# "09:00-17:00=2000, 22:00-06:00=0" <-> [{"start": "09:00", "end": "17:00", "limit_kbps": 2000}, ...]
+def parse_bandwidth_schedule(text):
+    schedule = []
+    for part in text.replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            window, limit = part.split("=")
+            start, end = (_parse_clock(t) for t in window.split("-"))
+            limit = int(limit)
+        except ValueError:
+            raise ValueError(f"Bad schedule entry '{part}', expected HH:MM-HH:MM=KB/s")
+        schedule.append({"start": f"{start // 60:02d}:{start % 60:02d}",
+                         "end": f"{end // 60:02d}:{end % 60:02d}", "limit_kbps": max(0, limit)})
+    return schedule
+
+
+def format_bandwidth_schedule(schedule):
+    return ", ".join(f"{w['start']}-{w['end']}={w['limit_kbps']}" for w in schedule or [])
+
+
+def _parse_clock(text):
+    hours, minutes = text.strip().split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(text)
+    return hours * 60 + minutes
+
+
+# Token bucket shared by all running jobs. The cap is split between the jobs that are actually
+# moving data, in proportion to their weight, and each job's progress hook sleeps once it has
+# used up its share. A stalled or finished job drops out of the split, so the others get its share.
+class BandwidthGovernor:
+    def __init__(self, limit_kbps=0, schedule=()):
+        self._lock = threading.Lock()
+        self._active = {}  # job id -> (weight, last time it moved data)
+        self._next_free = {}  # job id -> when its bucket is empty again
+        self.configure(limit_kbps, schedule)
+
+    def configure(self, limit_kbps, schedule=()):
+        with self._lock:
+            self.limit_kbps = max(0, int(limit_kbps or 0))
+            self.schedule = list(schedule or [])
+
+    # Bytes per second right now, 0 means unlimited. The first schedule window that covers
+    # the current time wins, outside all windows the global cap applies.
+    def current_limit(self):
+        now = time.localtime()
+        minute = now.tm_hour * 60 + now.tm_min
+        limit_kbps = self.limit_kbps
+        for window in self.schedule:
+            start, end = _parse_clock(window["start"]), _parse_clock(window["end"])
+            # A window like 22:00-06:00 runs over midnight
+            if start <= minute < end if start <= end else (minute >= start or minute < end):
+                limit_kbps = window["limit_kbps"]
+                break
+        return limit_kbps * 1024
+
+    # Called from the job's progress hook with the bytes received since the last call
+    def throttle(self, job, nbytes):
+        limit = self.current_limit()
+        now = time.monotonic()
+        with self._lock:
+            self._active[job.id] = (job.weight, now)
+            if not limit:
+                self._next_free.pop(job.id, None)
+                return
+            total_weight = sum(weight for weight, seen in self._active.values()
+                               if now - seen < BANDWIDTH_STALL_SECONDS)
+            rate = limit * job.weight / total_weight
+            # An idle bucket fills up to BANDWIDTH_BURST_SECONDS worth of bytes, never more
+            next_free = max(self._next_free.get(job.id, now), now - BANDWIDTH_BURST_SECONDS)
+            next_free += nbytes / rate
+            self._next_free[job.id] = next_free
+        delay = next_free - now
+        if delay > 0:
+            # Whatever isn't slept off here is still owed on the next call
+            time.sleep(min(delay, BANDWIDTH_MAX_SLEEP))
+
+    # Fixed bytes per second for a job the hook can't slow down (aria2c only reports at the end),
+    # 0 means unlimited. The job counts as moving data until release(), so the others leave it its share.
+    # It can't give bandwidth back when jobs start later, so each of the `slots` workers that
+    # isn't busy yet is counted with weight 1 up front.
+    def share(self, job, slots=1):
+        limit = self.current_limit()
+        now = time.monotonic()
+        with self._lock:
+            self._active[job.id] = (job.weight, float("inf"))
+            if not limit:
+                return 0
+            moving = [weight for weight, seen in self._active.values() if now - seen < BANDWIDTH_STALL_SECONDS]
+            total_weight = sum(moving) + max(0, slots - len(moving))
+            return int(limit * job.weight / total_weight)
+
+    def release(self, job):
+        with self._lock:
+            self._active.pop(job.id, None)
+            self._next_free.pop(job.id, None)
+
+
+# --- Job journal ---
+# Every job that hasn't reached a final state has a row here, written in the same step as its
+# state change. Finished, failed and cancelled jobs are deleted, so after a crash or a close
+# the table is exactly the queue to pick up again.
+# The GUI and yt_batch share the file, so every row records the PID of the process running it.
+def pid_running(pid):
+    if not pid:
+        return False
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # os.kill(pid, 0) would terminate the process on Windows
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Someone else's process, but it exists
+        return True
+    return True
+
+
+class JobJournal:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # A commit per transition, WAL keeps that to an append without a full fsync
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, title TEXT, format TEXT NOT NULL,"
+                " output_dir TEXT NOT NULL, priority INTEGER NOT NULL, weight INTEGER NOT NULL, max_height INTEGER,"
+                " state TEXT NOT NULL, files TEXT NOT NULL, streams TEXT NOT NULL DEFAULT '[]', updated REAL NOT NULL,"
+                " owner INTEGER)"
+            )
+            # Journals from before the ffmpeg stage have no streams column yet, older ones no owner
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(jobs)")]
+            if "streams" not in columns:
+                self._db.execute("ALTER TABLE jobs ADD COLUMN streams TEXT NOT NULL DEFAULT '[]'")
+            if "owner" not in columns:
+                self._db.execute("ALTER TABLE jobs ADD COLUMN owner INTEGER")
+
+    def add(self, job):
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO jobs (url, title, format, output_dir, priority, weight, max_height, state, files, streams, updated, owner)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job.url, job.title, job.fmt, job.output_dir, job.priority, job.weight, job.max_height,
+                 job.state, json.dumps(sorted(job.files)), json.dumps(job.streams or []), time.time(), os.getpid()),
+            )
+            job.journal_id = cursor.lastrowid
+
+    def update(self, job):
+        if job.journal_id is None:
+            return
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE jobs SET title = ?, state = ?, files = ?, streams = ?, updated = ? WHERE id = ?",
+                (job.title, job.state, json.dumps(sorted(job.files)), json.dumps(job.streams or []), time.time(), job.journal_id),
+            )
+
+    def remove(self, job):
+        if job.journal_id is None:
+            return
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM jobs WHERE id = ?", (job.journal_id,))
+        job.journal_id = None
+
+    # Rows of jobs that were still queued, running or paused, oldest first. Rows of a process
+    # that is still running (another GUI or yt_batch) are left to it.
+    def pending(self):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, url, title, format, output_dir, priority, weight, max_height, state, files, streams, owner"
+                " FROM jobs ORDER BY id"
+            ).fetchall()
+        keys = ("id", "url", "title", "format", "output_dir", "priority", "weight", "max_height", "state", "files", "streams", "owner")
+        return [dict(zip(keys, row)) for row in rows if not pid_running(row[-1])]
+
+    # Takes over a row from pending(). False if another process got to it first.
+    def claim(self, row):
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "UPDATE jobs SET owner = ? WHERE id = ? AND owner IS ?", (os.getpid(), row["id"], row["owner"])
+            )
+            return cursor.rowcount == 1
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# --- Retry policy ---
+ERROR_THROTTLE = "throttle"
+ERROR_NETWORK = "network"
+ERROR_GEO = "geo"
+ERROR_UNAVAILABLE = "unavailable"
+ERROR_FFMPEG = "ffmpeg"
+ERROR_OTHER = "other"
+
+# Worth another attempt later, everything else fails the job
+TRANSIENT_ERRORS = (ERROR_THROTTLE, ERROR_NETWORK)
+# First retry waits about this long, doubling per attempt up to RETRY_MAX_DELAY
+RETRY_BASE_DELAY = {ERROR_THROTTLE: 30.0, ERROR_NETWORK: 5.0}
+RETRY_MAX_DELAY = 10 * 60
+
+# Checked in order against the lowercased yt-dlp message, first match wins
+ERROR_PATTERNS = (
+    # "Sign in to confirm you’re not a bot" comes with a typographic apostrophe, so only the tail is matched
+    (ERROR_THROTTLE, ("http error 429", "too many requests", "rate-limit", "rate limit", "not a bot")),
+    (ERROR_GEO, ("available in your country", "geo restrict", "geo-restrict", "blocked it in your country")),
+    (ERROR_UNAVAILABLE, ("requested format is not available", "video unavailable", "private video", "has been removed", "is not available",
+                         "members-only", "account associated with this video has been terminated",
+                         "sign in to confirm your age", "unsupported url", "http error 404", "http error 410")),
+    (ERROR_FFMPEG, ("ffmpeg", "ffprobe", "postprocessing", "conversion failed", "merging of multiple formats")),
+    (ERROR_NETWORK, ("http error 5", "timed out", "timeout", "connection reset", "connection refused",
+                     "connection aborted", "temporary failure in name resolution", "name or service not known",
+                     "network is unreachable", "incompleteread", "remote end closed", "unable to download",
+                     "got error", "urlopen error", "ssl",
+                     # YouTube's stream URLs expire or get refused, the retry extracts fresh ones
+                     "http error 403")),
+)
+
+
+def classify_error(message):
+    message = (message or "").lower()
+    for kind, patterns in ERROR_PATTERNS:
+        if any(pattern in message for pattern in patterns):
+            return kind
+    return ERROR_OTHER
+
+
+# Exponential backoff with jitter: somewhere between half and all of base * 2^attempt, so jobs
+# that failed together (a 429 burst hits every running job) don't all come back at once
+def retry_delay(kind, attempt):
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY.get(kind, 5.0) * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
+
+
+# Removes what an interrupted download leaves behind: .part files, fragment files and the .ytdl resume state
+def cleanup_partial_files(filenames):
+    for name in filenames:
+        candidates = [name, name + ".part", name + ".ytdl"]
+        candidates += glob.glob(glob.escape(name) + ".part-Frag*")
+        for path in candidates:
+            try:
+                if os.path.isfile(path):
+                    os.remove(path)
+            except OSError as e:
+                print(f"Failed to remove {path}: {e}", file=sys.stderr)
+
+
+# --- Engine ---
+class DownloadEngine:
+    def __init__(self, settings=None, settings_path=SETTINGS_FILE, quiet=False):
+        self.settings_path = settings_path
+        self.settings = settings if settings is not None else load_settings(settings_path)
+        self.quiet = quiet
+        self.sessions = YdlSessionPool()
+        state_dir = os.path.dirname(os.path.abspath(settings_path))
+        self.search_cache = SearchCache(os.path.join(state_dir, SEARCH_CACHE_FILE))
+        self.archive = DownloadArchive(os.path.join(state_dir, ARCHIVE_FILE))
+        self.format_cache = FormatCache()
+        self.thumbnails = ThumbnailStore(os.path.join(state_dir, THUMBNAIL_DIR))
+        self.journal = JobJournal(os.path.join(state_dir, JOURNAL_FILE))
+        self.scheduler = DownloadScheduler(self.run_download, self.settings["max_concurrent_downloads"], self._job_crashed)
+        self.connections = ConnectionBudget(self.settings["max_connections"])
+        # Second stage: ffmpeg runs on its own pool, so network workers move on to the next download
+        self.postprocessor = DownloadScheduler(self.run_postprocess, self.postprocess_workers(), self._job_crashed)
+        self.audio_meter = EncodeMeter()
+        self.bandwidth = BandwidthGovernor(self.settings["bandwidth_limit_kbps"], self.settings["bandwidth_schedule"])
+        self.jobs = []
+        # Reentrant so on_job_changed callbacks may call back into the engine
+        self._jobs_cond = threading.Condition(threading.RLock())
+        # Called from worker threads with the job, clients must not touch a GUI from in here
+        self.on_job_changed = None
+        self.on_progress = None
+
+    def apply_settings(self):
+        self.scheduler.set_concurrency(self.settings["max_concurrent_downloads"])
+        self.postprocessor.set_concurrency(self.postprocess_workers())
+        self.connections.set_limit(self.settings["max_connections"])
+        self.bandwidth.configure(self.settings["bandwidth_limit_kbps"], self.settings["bandwidth_schedule"])
+
+    def save_settings(self):
+        save_settings(self.settings, self.settings_path)
+
+    def postprocess_workers(self):
+        return self.settings["postprocess_workers"] or os.cpu_count() or 1
+
+    # Per stage: queue depth, busy/total workers and utilization since the last call,
+    # plus the audio extraction throughput so far
+    def stage_stats(self):
+        return {"network": self.scheduler.stats(), "postprocess": self.postprocessor.stats(),
+                "audio_extraction": self.audio_meter.stats()}
+
+    # --- Search ---
+    # Yields {'title', 'url'} dicts as yt-dlp extracts them, closing the generator early stops
+    # the extractor from fetching further result pages
+    def iter_search(self, query, limit):
+        with self.sessions.session("search", SEARCH_OPTIONS) as ydl:
+            # process=False hands back the lazy entries generator instead of the finished list
+            result = ydl.extract_info(f"ytsearch{limit}:{query}", download=False, process=False)
+            entries_iter = iter(result.get("entries") or [])
+            try:
+                for e in entries_iter:
+                    if not e.get('id'):
+                        continue
+                    yield {'title': e.get('title') or e['id'], 'url': f"https://www.youtube.com/watch?v={e['id']}"}
+            finally:
+                close = getattr(entries_iter, "close", None)
+                if close:
+                    close()
+
+    # Yields {'title', 'url'} for every video behind a playlist, channel or video URL. Only the
+    # page being read is held in memory, so a channel with thousands of uploads starts listing
+    # right away and costs the same memory as a short playlist.
+    def iter_playlist(self, url):
+        if not url.lower().startswith(("http://", "https://")):
+            url = "https://" + url
+        with self.sessions.session("playlist", PLAYLIST_OPTIONS) as ydl:
+            # First in, first out, so a channel's Videos tab is listed before Shorts and Live
+            pending = deque([url])
+            seen_tabs = {url}
+            while pending:
+                current = pending.popleft()
+                result = ydl.extract_info(current, download=False, process=False)
+                if result.get('_type') in ('url', 'url_transparent'):
+                    # With process=False a redirect (youtu.be, a handle, a /c/ page) comes back
+                    # unresolved, its id isn't a video id, so follow it like a tab
+                    if result.get('url') and result['url'] not in seen_tabs:
+                        seen_tabs.add(result['url'])
+                        pending.append(result['url'])
+                    continue
+                if result.get('_type') not in ('playlist', 'multi_video'):
+                    # A plain video URL
+                    if result.get('id'):
+                        yield {'title': result.get('title') or result['id'], 'url': result_url(result, current)}
+                    continue
+                entries_iter = iter(result.get('entries') or [])
+                try:
+                    for e in entries_iter:
+                        if e.get('ie_key') == 'YoutubeTab' or e.get('_type') == 'playlist':
+                            # A channel's home page lists its tabs (Videos, Shorts, ...) as nested playlists
+                            if e.get('url') and e['url'] not in seen_tabs:
+                                seen_tabs.add(e['url'])
+                                pending.append(e['url'])
+                            continue
+                        entry_url = result_url(e)
+                        if not entry_url:
+                            continue
+                        yield {'title': e.get('title') or e.get('id') or entry_url, 'url': entry_url}
+                finally:
+                    close = getattr(entries_iter, "close", None)
+                    if close:
+                        close()
+
+    # Returns summarize_formats() of the video, probed once per FORMAT_CACHE_TTL.
+    # Blocks on the network when it isn't cached, call it off the GUI thread.
+    def probe_formats(self, url):
+        key = video_id_from_url(url) or url
+        formats = self.format_cache.get(key)
+        if formats is not None:
+            return formats
+        with self.sessions.session("probe", PROBE_OPTIONS) as ydl:
+            # process=False skips format selection, the raw list is all we need
+            info = ydl.extract_info(url, download=False, process=False)
+        formats = summarize_formats(info.get('formats'))
+        self.format_cache.put(key, formats)
+        return formats
+
+    # --- Jobs ---
+    def submit(self, url, title=None, fmt=None, output_dir=None, priority=0, weight=1, max_height=None):
+        job = DownloadJob(url, title or url, fmt or self.settings["download_format"],
+                          output_dir or self.settings["output_dir"], priority, weight, max_height)
+        self.journal.add(job)
+        with self._jobs_cond:
+            self.jobs.append(job)
+        self.scheduler.submit(job)
+        return job
+
+    # Puts the jobs the journal still has from the last run back in the queue and returns them.
+    # Jobs that were mid-download continue from their .part files (yt-dlp resumes with a range
+    # request), paused jobs come back paused.
+    def recover(self):
+        jobs = []
+        for row in self.journal.pending():
+            if not self.journal.claim(row):
+                continue
+            job = DownloadJob(row["url"], row["title"] or row["url"], row["format"], row["output_dir"],
+                              row["priority"], row["weight"], row["max_height"])
+            job.journal_id = row["id"]
+            job.files = set(json.loads(row["files"]))
+            job.streams = [tuple(stream) for stream in json.loads(row["streams"])]
+            # Streams that are all still on disk only need the ffmpeg stage again
+            ready = job.streams and all(os.path.exists(path) for path, _, _ in job.streams)
+            if row["state"] == JOB_PAUSED:
+                job.state = JOB_PAUSED
+            elif ready and row["state"] in (JOB_POSTPROCESS_QUEUED, JOB_MERGING):
+                job.state = JOB_POSTPROCESS_QUEUED
+            else:
+                job.state = JOB_QUEUED
+            self.journal.update(job)
+            with self._jobs_cond:
+                self.jobs.append(job)
+            if job.state == JOB_QUEUED:
+                self.scheduler.submit(job)
+            elif job.state == JOB_POSTPROCESS_QUEUED:
+                self.postprocessor.submit(job)
+            jobs.append(job)
+        return jobs
+
+    # Bulk enqueue from a result list. Videos that already have a queued, running or paused
+    # job are left out, as are repeats within `entries`. Returns the new jobs.
+    def submit_all(self, entries, **kwargs):
+        with self._jobs_cond:
+            queued = {job.video_id or job.url for job in self.jobs if job.state in ACTIVE_STATES + (JOB_PAUSED,)}
+        jobs = []
+        for entry in entries:
+            key = video_id_from_url(entry['url']) or entry['url']
+            if key in queued:
+                continue
+            queued.add(key)
+            jobs.append(self.submit(entry['url'], entry.get('title'), **kwargs))
+        return jobs
+
+    # Queued jobs are pulled out of the scheduler right here, running ones stop at their next progress tick
+    def pause(self, job):
+        if job.state == JOB_QUEUED and self.scheduler.remove(job):
+            self._set_state(job, JOB_PAUSED)
+        elif job.state == JOB_RETRY_WAIT and self._cancel_retry(job):
+            self._set_state(job, JOB_PAUSED)
+        elif job.state == JOB_POSTPROCESS_QUEUED and self.postprocessor.remove(job):
+            # On resume the network stage finds the streams on disk and hands them straight back
+            self._set_state(job, JOB_PAUSED)
+        elif job.state == JOB_MERGING:
+            # ffmpeg can't be paused, let it finish
+            return
+        elif job.state == JOB_DOWNLOADING and job.external:
+            # Would only take effect after aria2c has fetched the whole file
+            return
+        elif job.state in ACTIVE_STATES:
+            job.control = CONTROL_PAUSE
+
+    def resume(self, job):
+        if job.state == JOB_PAUSED:
+            job.control = None
+            self._set_state(job, JOB_QUEUED)
+            self.scheduler.submit(job)
+
+    # Failed jobs start over with a fresh retry count
+    def retry(self, job):
+        if job.state == JOB_FAILED:
+            job.attempts = 0
+            job.error = job.error_kind = None
+            job.control = None
+            self.journal.add(job)
+            self._set_state(job, JOB_QUEUED)
+            self.scheduler.submit(job)
+
+    def cancel(self, job):
+        if job.state == JOB_QUEUED and self.scheduler.remove(job):
+            self._set_state(job, JOB_CANCELLED)
+        elif job.state == JOB_RETRY_WAIT and self._cancel_retry(job):
+            cleanup_partial_files(job.files)
+            self._set_state(job, JOB_CANCELLED)
+        elif job.state == JOB_POSTPROCESS_QUEUED and self.postprocessor.remove(job):
+            cleanup_partial_files(job.files)
+            self._set_state(job, JOB_CANCELLED)
+        elif job.state == JOB_PAUSED:
+            cleanup_partial_files(job.files)
+            self._set_state(job, JOB_CANCELLED)
+        elif job.state == JOB_DOWNLOADING and job.external:
+            return
+        elif job.state in ACTIVE_STATES:
+            job.control = CONTROL_CANCEL
+            process = job.process
+            if process:
+                process.terminate()
+
+    # Blocks until every job is finished, failed, cancelled or paused
+    def wait(self):
+        with self._jobs_cond:
+            while any(job.state in ACTIVE_STATES for job in self.jobs):
+                self._jobs_cond.wait()
+
+    def close(self):
+        self.sessions.close_all()
+        self.archive.close()
+        self.journal.close()
+
+    # Imports yt_dlp and builds the search session in the background, so the first search
+    # doesn't pay for it. Meant to be called once the window is up.
+    def warm_up(self):
+        def run():
+            try:
+                with self.sessions.session("search", SEARCH_OPTIONS):
+                    pass
+            except Exception as e:
+                print(f"Warm-up failed: {e}", file=sys.stderr)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    # Returns (profile, ydl_opts), jobs with the same profile can share a pooled YoutubeDL.
+    # No postprocessors here, the ffmpeg stage (run_postprocess) does the merge/encode.
+    def download_options(self, job):
+        # Every stream gets its own file, the ffmpeg stage writes '<title>.<fmt>' from them
+        outtmpl = os.path.join(job.output_dir, '%(title)s.f%(format_id)s.%(ext)s')
+        ydl_opts = dict(self.format_params(job), outtmpl=outtmpl, noplaylist=True)
+        if self.quiet:
+            ydl_opts.update({'quiet': True, 'noprogress': True})
+        return (job.fmt, job.output_dir), ydl_opts
+
+    # Runs on a scheduler worker thread
+    def run_download(self, job):
+        if job.state != JOB_QUEUED:
+            return
+        if job.control:
+            # Paused or cancelled between leaving the queue and starting
+            self._set_state(job, JOB_CANCELLED if job.control == CONTROL_CANCEL else JOB_PAUSED)
+            return
+        if job.video_id and self.settings["skip_archived"]:
+            # A 480p download doesn't stand in for 1080p of the same video
+            archived = self.archive.lookup(job.video_id, job.fmt, height=self._archive_height(job))
+            if archived:
+                job.path = archived["path"]
+                job.downloaded = job.total = archived["size"]
+                self._set_state(job, JOB_SKIPPED)
+                return
+        profile, ydl_opts = self.download_options(job)
+        connections = self.connections.acquire(self.settings["concurrent_fragments"])
+        job.seen_bytes = {}
+        job.streams = []
+        job.external = self.settings["external_downloader"] if self.settings["external_downloader"] != "native" else None
+        if job.external:
+            # No 'downloading' ticks will come to do this
+            self._set_state(job, JOB_DOWNLOADING)
+
+        try:
+            with self.sessions.session(profile, ydl_opts,
+                                       lambda d: self._hook(job, d), lambda d: self._pp_hook(job, d),
+                                       dict(self.connection_params(connections, job), **self.format_params(job))) as ydl:
+                info = ydl.extract_info(job.url, download=True)
+            job.streams = downloaded_streams(info)
+            job.files.update(path for path, _, _ in job.streams)
+            if info and info.get('duration'):
+                job.duration = info['duration']
+            out_path, args = self._postprocess_plan(job)
+            if args is None:
+                # Nothing for ffmpeg to do, the file only needs its final name
+                if job.streams[0][0] != out_path:
+                    os.replace(job.streams[0][0], out_path)
+                job.path = out_path
+                self._archive(job)
+                self._set_state(job, JOB_DONE)
+            else:
+                self._set_state(job, JOB_POSTPROCESS_QUEUED)
+                self.postprocessor.submit(job)
+        except JobInterrupted:
+            if job.control == CONTROL_CANCEL:
+                cleanup_partial_files(job.files)
+                self._set_state(job, JOB_CANCELLED)
+            else:
+                # .part and .ytdl files stay put, yt-dlp picks them up with a range request on resume
+                self._set_state(job, JOB_PAUSED)
+        except Exception as e:
+            job.error = str(e)
+            job.error_kind = classify_error(job.error)
+            if job.error_kind in TRANSIENT_ERRORS and job.attempts < self.settings["max_retries"]:
+                self._schedule_retry(job)
+            else:
+                self._set_state(job, JOB_FAILED)
+        finally:
+            self.connections.release(connections)
+            self.bandwidth.release(job)
+
+    # Runs on a postprocessor worker thread: merges/encodes the streams the network stage left behind
+    def run_postprocess(self, job):
+        if job.state != JOB_POSTPROCESS_QUEUED:
+            return
+        if job.control == CONTROL_CANCEL:
+            cleanup_partial_files(job.files)
+            self._set_state(job, JOB_CANCELLED)
+            return
+        self._set_state(job, JOB_MERGING)
+        audio = job.fmt in AUDIO_FORMATS
+        if audio:
+            self.audio_meter.start()
+        done = False
+        try:
+            job.path = self._postprocess(job)
+            done = True
+            self._archive(job)
+            self._set_state(job, JOB_DONE)
+        except JobInterrupted:
+            cleanup_partial_files(job.files)
+            self._set_state(job, JOB_CANCELLED)
+        except Exception as e:
+            job.error = str(e)
+            job.error_kind = ERROR_FFMPEG
+            self._set_state(job, JOB_FAILED)
+        finally:
+            if audio:
+                self.audio_meter.finish((job.duration or 0) if done else None)
+
+    # Returns (final path, ffmpeg args), args is None when renaming the download is all there is to do
+    def _postprocess_plan(self, job):
+        if not job.streams:
+            raise ValueError("nothing was downloaded")
+        first = job.streams[0]
+        # '<title>.f<format_id>.<ext>' -> '<title>.<fmt>'
+        base = first[0].rsplit(".", 2)[0] if first[0].count(".") >= 2 else os.path.splitext(first[0])[0]
+        if job.fmt in AUDIO_FORMATS and self.settings["keep_native_audio"] and audio_passthrough(first, job.fmt):
+            # e.g. opus stays in the .webm it came in
+            return f"{base}.{first[0].rsplit('.', 1)[-1]}", None
+        out_path = f"{base}.{job.fmt}"
+        return out_path, postprocess_args(job.streams, job.fmt, out_path)
+
+    def _postprocess(self, job):
+        out_path, args = self._postprocess_plan(job)
+        if args is None:
+            os.replace(job.streams[0][0], out_path)
+            return out_path
+
+        import subprocess
+        # Written next to the target first, so a failed or cancelled run never leaves a half file under the real name
+        temp_path = f"{os.path.splitext(out_path)[0]}.temp.{job.fmt}"
+        args[-1] = temp_path
+        job.files.add(temp_path)
+        job.process = subprocess.Popen([ffmpeg_executable(), '-hide_banner', '-loglevel', 'error'] + args,
+                                       stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            _, stderr = job.process.communicate()
+        finally:
+            returncode = job.process.returncode
+            job.process = None
+        if job.control == CONTROL_CANCEL:
+            raise JobInterrupted(job.control)
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg failed: {stderr.decode(errors='replace').strip()[-500:]}")
+        os.replace(temp_path, out_path)
+        for path, _, _ in job.streams:
+            if path != out_path and os.path.isfile(path):
+                os.remove(path)
+        return out_path
+
+    # The back-off runs on a timer, the worker is free for the next job in the meantime
+    def _schedule_retry(self, job):
+        delay = retry_delay(job.error_kind, job.attempts)
+        job.attempts += 1
+        job.retry_timer = threading.Timer(delay, self._retry_due, (job,))
+        job.retry_timer.daemon = True
+        job.eta = delay
+        self._set_state(job, JOB_RETRY_WAIT)
+        job.retry_timer.start()
+
+    def _retry_due(self, job):
+        with self._jobs_cond:
+            if job.state != JOB_RETRY_WAIT or job.retry_timer is None:
+                return
+            job.retry_timer = None
+            self._set_state(job, JOB_QUEUED)
+        self.scheduler.submit(job)
+
+    # False if the timer already fired and the job is on its way back to the queue
+    def _cancel_retry(self, job):
+        with self._jobs_cond:
+            if job.state != JOB_RETRY_WAIT or job.retry_timer is None:
+                return False
+            job.retry_timer.cancel()
+            job.retry_timer = None
+            return True
+
+    # The format selector depends on the job's resolution, so it's set per checkout
+    # instead of splitting the session pool into one profile per resolution
+    def format_params(self, job):
+        if job.fmt in AUDIO_FORMATS:
+            return {'format': audio_format(job.fmt, self.settings["audio_min_kbps"], self.settings["strict_audio_only"])}
+        if job.max_height is not None:
+            return {'format': mp4_format(job.max_height, self.settings["max_bitrate_kbps"], exact_height=True)}
+        return {'format': mp4_format(self.settings["max_height"], self.settings["max_bitrate_kbps"])}
+
+    # yt-dlp params that let one job use `connections` parallel connections
+    def connection_params(self, connections, job=None):
+        params = {'concurrent_fragment_downloads': connections}
+        if self.settings["external_downloader"] == "aria2c":
+            # aria2c splits plain (non-fragmented) files into ranges too
+            params['external_downloader'] = {'default': 'aria2c'}
+            params['external_downloader_args'] = {
+                'aria2c': ['-x', str(connections), '-s', str(connections), '-k', '1M'],
+            }
+            # The progress hook never sees aria2c's bytes, so the governor can't throttle it. Its share
+            # goes in as ratelimit (--max-overall-download-limit) instead, fixed for the whole file,
+            # a schedule window that starts mid-download applies from the next job on.
+            params['ratelimit'] = (self.bandwidth.share(job, self.settings["max_concurrent_downloads"]) if job else 0) or None
+        else:
+            params['external_downloader'] = {}
+            params['external_downloader_args'] = {}
+            params['ratelimit'] = None
+        return params
+
+    # Picked resolution the archive row is keyed on, audio files have none
+    def _archive_height(self, job):
+        return None if job.fmt in AUDIO_FORMATS else job.max_height
+
+    def _archive(self, job):
+        if not (job.video_id and job.path and os.path.isfile(job.path)):
+            return
+        try:
+            self.archive.record(job.video_id, job.fmt, job.path, self._archive_height(job))
+        except (OSError, sqlite3.Error) as e:
+            print(f"Failed to archive {job.path}: {e}", file=sys.stderr)
+
+    # Anything that escapes run_download/run_postprocess still goes through _set_state,
+    # otherwise the journal row stays, the GUI never hears and wait() can hang
+    def _job_crashed(self, job, error):
+        job.error = str(error)
+        job.error_kind = classify_error(job.error)
+        self._set_state(job, JOB_FAILED)
+
+    def _set_state(self, job, state):
+        # Under the lock so wait() never returns before the last callback has run
+        with self._jobs_cond:
+            if job.state == state:
+                return
+            job.state = state
+            if state != JOB_DOWNLOADING:
+                job.speed = 0
+                # While waiting to retry, the ETA column shows the back-off delay
+                if state != JOB_RETRY_WAIT:
+                    job.eta = None
+            try:
+                if state in ACTIVE_STATES + (JOB_PAUSED,):
+                    self.journal.update(job)
+                else:
+                    self.journal.remove(job)
+            except sqlite3.Error as e:
+                print(f"Failed to journal {job.title}: {e}", file=sys.stderr)
+            if self.on_job_changed:
+                self.on_job_changed(job)
+            self._jobs_cond.notify_all()
+
+    def _hook(self, job, d):
+        if d.get('filename') and d['filename'] not in job.files:
+            job.files.add(d['filename'])
+            # So a cancel after a restart still knows what to clean up
+            self.journal.update(job)
+        if job.control:
+            raise JobInterrupted(job.control)
+        info = d.get('info_dict') or {}
+        if job.title == job.url and info.get('title'):
+            job.title = info['title']
+        if info.get('id'):
+            job.video_id = info['id']
+        if info.get('duration'):
+            job.duration = info['duration']
+
+        if d['status'] == 'downloading':
+            self._throttle(job, d)
+            job.downloaded = d.get('downloaded_bytes') or 0
+            job.total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+            job.speed = d.get('speed') or 0
+            job.eta = d.get('eta')
+            job.fragment = d.get('fragment_index')
+            job.fragments = d.get('fragment_count')
+            self._set_state(job, JOB_DOWNLOADING)
+        elif d['status'] == 'finished':
+            job.downloaded = job.total = d.get('total_bytes') or job.downloaded
+            job.speed = 0
+            job.eta = None
+        if self.on_progress:
+            self.on_progress(job, d)
+
+    def _throttle(self, job, d):
+        name = d.get('filename') or ''
+        downloaded = d.get('downloaded_bytes') or 0
+        # The first tick of a file only sets the baseline, on resume it already counts the .part on disk
+        previous = job.seen_bytes.get(name, downloaded)
+        job.seen_bytes[name] = downloaded
+        if downloaded > previous:
+            self.bandwidth.throttle(job, downloaded - previous)
+
+    # Only yt-dlp's own fixups run in the network stage, the real post-processing is run_postprocess
+    def _pp_hook(self, job, d):
+        if job.control:
+            raise JobInterrupted(job.control)